@@ -8,7 +8,9 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List, Optional
+import array
+import bisect
+from typing import TYPE_CHECKING, List, Iterator, Optional, Sequence, cast
 
 if TYPE_CHECKING:
     from dncil.cil.instruction import Instruction
@@ -23,9 +25,18 @@ from dncil.cil.instruction import Instruction
 
 
 class CilMethodBody:
-    """store managed method body"""
+    """store managed method body
 
-    def __init__(self, reader: CilMethodBodyReaderBase):
+    with columnar set, instructions are decoded into an InstructionColumns sequence that stores instruction fields
+    in parallel arrays and builds Instruction objects only when indexed
+
+    with lazy set, only the header and exception handlers are parsed up front; instructions are decoded on first
+    access to instructions, or one at a time through iter_instructions. the reader must remain usable until then.
+    a lazy method body assumes its instructions end with the method code; if the operand of the last instruction
+    extends past it, see get_code_end, the method body bytes and exception handlers differ from an eager decode
+    """
+
+    def __init__(self, reader: CilMethodBodyReaderBase, columnar: bool = False, lazy: bool = False):
         self.offset: int
         self.header_size: int
         self.flags: CilMethodBodyFlags
@@ -33,47 +44,188 @@ class CilMethodBody:
         self.code_size: int
         self.local_var_sig_tok: Optional[Token]
         self.size: int
-        self.raw_bytes: bytes
         self.exception_handlers_size: int
 
-        self.instructions: List[Instruction] = []
+        self.columnar: bool = columnar
         self.exception_handlers: List[ExceptionHandler] = []
 
+        # method body bytes, or None until raw_bytes is accessed if the reader provides a zero-copy view
+        self._raw_bytes: Optional[bytes] = None
+        self._raw_view: Optional[memoryview] = None
+
+        # decoded instructions, or None until a lazy method body decodes them using the saved reader
+        self._instructions: Optional[Sequence[Instruction]] = None
+        self._reader: Optional[CilMethodBodyReaderBase] = None
+
+        # IL offset of each instruction, built on first lookup by offset
+        self._instruction_offsets: Optional[Sequence[int]] = None
+
         # set method offset
         self.offset = reader.tell()
 
         # parse the method body
         self.parse_header(reader)
-        self.parse_instructions(reader)
+        if lazy:
+            # skip instructions; they are decoded on demand
+            self._reader = reader
+            reader.seek(reader.tell() + self.code_size)
+        else:
+            self.parse_instructions(reader)
         self.parse_exception_handlers(reader)
 
-        # use initial offset + method body size to read method body bytes (not the most efficient)
-        final_pos = reader.tell()
-        reader.seek(self.offset)
-        self.raw_bytes = reader.read(self.size)
-        reader.seek(final_pos)
+        # reference method body bytes in place if the reader supports it, otherwise read them again
+        self._raw_view = reader.view(self.offset, self.size)
+        if self._raw_view is None:
+            final_pos = reader.tell()
+            reader.seek(self.offset)
+            self._raw_bytes = reader.read(self.size)
+            reader.seek(final_pos)
 
         # calculate exception handlers size
         self.exception_handlers_size = self.size - self.header_size - self.code_size
 
+    def __getstate__(self) -> dict:
+        # views and readers cannot be pickled; decode lazy instructions and copy method body bytes instead
+        state: dict = self.__dict__.copy()
+        state["_instructions"] = self.instructions
+        state["_raw_bytes"] = self.raw_bytes
+        state["_raw_view"] = None
+        state["_reader"] = None
+        return state
+
     def __int__(self) -> int:
         return self.offset
 
+    @property
+    def instructions(self) -> Sequence[Instruction]:
+        """get CIL instructions, decoding them first if needed"""
+        if self._instructions is None:
+            reader: CilMethodBodyReaderBase = cast("CilMethodBodyReaderBase", self._reader)
+
+            pos: int = reader.tell()
+            reader.seek(self.offset + self.header_size)
+            try:
+                self.parse_instructions(reader)
+            finally:
+                reader.seek(pos)
+
+            # instructions are decoded once so the reader is no longer needed
+            self._reader = None
+        return cast(Sequence[Instruction], self._instructions)
+
+    @instructions.setter
+    def instructions(self, instructions: Sequence[Instruction]):
+        self._instructions = instructions
+        self._reader = None
+        self._instruction_offsets = None
+
+    def iter_instructions(self) -> Iterator[Instruction]:
+        """get CIL instructions one at a time; instructions are not stored if they have not been decoded yet"""
+        if self._instructions is not None:
+            yield from self._instructions
+            return
+
+        reader: CilMethodBodyReaderBase = cast("CilMethodBodyReaderBase", self._reader)
+        pos: int = self.offset + self.header_size
+        code_end_offset: int = pos + self.code_size
+        insn_offset: int = pos
+
+        while pos < code_end_offset:
+            # the reader may be used between instructions so seek to the next instruction and restore afterwards
+            reader_pos: int = reader.tell()
+            reader.seek(pos)
+            try:
+                insn: Instruction = reader.read_instruction(insn_offset)
+                pos = reader.tell()
+            finally:
+                reader.seek(reader_pos)
+
+            insn_offset += insn.size
+            yield insn
+
+    def get_code_end(self) -> int:
+        """get IL offset of the end of the last instruction; exceeds code_size if its operand extends past the method
+        code, which the reader accepts"""
+        if not self.instructions:
+            return 0
+        last: Instruction = self.instructions[-1]
+        return last.offset + last.size - (self.offset + self.header_size)
+
+    def get_instruction_offsets(self) -> Sequence[int]:
+        """get sorted IL offsets of instructions, i.e. relative to the start of the method code"""
+        if self._instruction_offsets is None:
+            # imported here as the columns module depends on the reader module, which depends on this module
+            from dncil.cil.body.columns import InstructionColumns
+
+            instructions: Sequence[Instruction] = self.instructions
+            if isinstance(instructions, InstructionColumns):
+                # columns already store IL offsets
+                self._instruction_offsets = instructions.offsets
+            else:
+                code_offset: int = self.offset + self.header_size
+                self._instruction_offsets = array.array("I", [insn.offset - code_offset for insn in instructions])
+        return self._instruction_offsets
+
+    def index_of(self, offset: int) -> int:
+        """get index in instructions of the instruction at offset, as stored in Instruction.offset and branch targets
+
+        IL offsets, e.g. of exception handlers, must be converted by adding offset + header_size. raises ValueError
+        if no instruction starts at offset, including if offset is in the middle of an instruction
+        """
+        offsets: Sequence[int] = self.get_instruction_offsets()
+        il_offset: int = offset - self.offset - self.header_size
+
+        index: int = bisect.bisect_left(offsets, il_offset)
+        if index < len(offsets) and offsets[index] == il_offset:
+            return index
+        if 0 < index and il_offset < self.code_size:
+            raise ValueError(
+                "offset 0x%X is in the middle of instruction @ offset 0x%X"
+                % (offset, self.offset + self.header_size + offsets[index - 1])
+            )
+        raise ValueError("offset 0x%X is outside method code" % offset)
+
+    def get_instruction_at(self, offset: int) -> Instruction:
+        """get instruction at offset, as stored in Instruction.offset and branch targets"""
+        return self.instructions[self.index_of(offset)]
+
+    @property
+    def raw_bytes(self) -> bytes:
+        """get method body bytes, copying them out of the reader buffer on first access"""
+        if self._raw_bytes is None:
+            self._raw_bytes = cast(memoryview, self._raw_view).tobytes()
+        return self._raw_bytes
+
+    @raw_bytes.setter
+    def raw_bytes(self, raw_bytes: bytes):
+        self._raw_bytes = raw_bytes
+        self._raw_view = None
+
+    def get_bytes_view(self) -> memoryview:
+        """get zero-copy view of method body bytes
+
+        if the reader provides views, e.g. CilMethodBodyReaderBuffer with zero_copy set, this references the reader
+        buffer, so an mmap cannot be closed while it exists
+        """
+        if self._raw_view is not None:
+            return self._raw_view
+        return memoryview(self.raw_bytes)
+
     def get_bytes(self) -> bytes:
         """get method body bytes"""
         return self.raw_bytes
 
     def get_header_bytes(self) -> bytes:
         """get method header bytes"""
-        return self.raw_bytes[: self.header_size]
+        return self.get_bytes_view()[: self.header_size].tobytes()
 
     def get_instruction_bytes(self) -> bytes:
         """get method instruction bytes"""
-        return self.raw_bytes[self.header_size : self.header_size + self.code_size]
+        return self.get_bytes_view()[self.header_size : self.header_size + self.code_size].tobytes()
 
     def get_exception_handler_bytes(self) -> bytes:
         """get method exception handler bytes"""
-        return self.raw_bytes[self.header_size + self.code_size :]
+        return self.get_bytes_view()[self.header_size + self.code_size :].tobytes()
 
     def parse_header(self, reader: CilMethodBodyReaderBase):
         """get method body header"""
@@ -114,14 +266,27 @@ class CilMethodBody:
 
     def parse_instructions(self, reader: CilMethodBodyReaderBase):
         """get CIL instructions"""
-        current_offset: int = self.offset + self.header_size
-        code_end_offset: int = reader.tell() + self.code_size
-
-        # instructions are stored sequentially so we just read through the stream
-        while reader.tell() < code_end_offset:
-            insn: Instruction = reader.read_instruction(current_offset)
-            current_offset += insn.size
-            self.instructions.append(insn)
+        if self.columnar:
+            # imported here as the columns module depends on the reader module, which depends on this module
+            from dncil.cil.body.columns import InstructionColumns
+
+            code_start: int = reader.tell()
+            code: bytes = reader.read(self.code_size)
+            if len(code) != self.code_size:
+                raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % reader.tell())
+            try:
+                self.instructions = InstructionColumns.from_bytes(code, self.offset + self.header_size)
+            except MethodBodyFormatError:
+                # the reader lets the last operand extend past the method code, so decode as it does to find the end
+                # of the code, or raise the same error
+                reader.seek(code_start)
+                reader.read_instructions(self.offset + self.header_size, self.code_size)
+                code_end: int = reader.tell()
+                reader.seek(code_start)
+                code = reader.read(code_end - code_start)
+                self.instructions = InstructionColumns.from_bytes(code, self.offset + self.header_size, self.code_size)
+        else:
+            self.instructions = reader.read_instructions(self.offset + self.header_size, self.code_size)
 
     def parse_exception_handlers(self, reader: CilMethodBodyReaderBase):
         """get exception handlers"""
@@ -0,0 +1,176 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import abc
+import hashlib
+import sqlite3
+import threading
+import collections
+from typing import TYPE_CHECKING, Union, Optional
+
+if TYPE_CHECKING:
+    import mmap
+
+    from dncil.cil.body.reader import CilMethodBodyReaderBase
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.serialize import dumps, loads
+
+
+def get_digest(body: CilMethodBody) -> bytes:
+    """get SHA-256 digest of method body bytes"""
+    return hashlib.sha256(body.get_bytes_view()).digest()
+
+
+class MethodBodyCacheBase(abc.ABC):
+    """abstract cache of decoded method bodies keyed by the digest of their bytes
+
+    method bodies are stored in the binary encoding of dncil.cil.body.serialize, so every hit returns a new method
+    body that stores its instructions in columns
+    """
+
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+        # guards the hit and miss counters, and the entries of caches that may be shared between threads
+        self.lock: threading.Lock = threading.Lock()
+
+    @abc.abstractmethod
+    def get_data(self, digest: bytes) -> Optional[bytes]:
+        """get encoded method body by digest, or None if not cached"""
+        ...
+
+    @abc.abstractmethod
+    def put_data(self, digest: bytes, data: bytes):
+        """store encoded method body by digest"""
+        ...
+
+    def read_method_body(self, reader: CilMethodBodyReaderBase) -> CilMethodBody:
+        """read managed method body at the reader offset, decoding instructions only if the method body is not cached"""
+        # parse the header and exception handlers to find the method body bytes without decoding instructions
+        body: CilMethodBody = CilMethodBody(reader, columnar=True, lazy=True)
+        digest: bytes = get_digest(body)
+
+        data: Optional[bytes] = self.get_data(digest)
+        if data is not None:
+            try:
+                cached: CilMethodBody = loads(data, body.offset)
+            except MethodBodyFormatError:
+                # written by an incompatible version; decode and store the method body again
+                pass
+            else:
+                with self.lock:
+                    self.hits += 1
+                return cached
+
+        with self.lock:
+            self.misses += 1
+        _ = body.instructions
+        if body.get_code_end() > body.code_size:
+            # the last operand extends past the method code, so the method body bytes and exception handlers are only
+            # known after decoding and the digest does not cover them; decode eagerly and do not cache the result
+            reader.seek(body.offset)
+            return CilMethodBody(reader, columnar=True)
+
+        self.put_data(digest, dumps(body))
+        return body
+
+    def read_method_body_from_bytes(self, bio: Union[bytes, bytearray, memoryview, mmap.mmap]) -> CilMethodBody:
+        """read managed method body from byte stream"""
+        # imported here as the reader module depends on the method body module, which this module depends on
+        from dncil.cil.body.reader import CilMethodBodyReaderBuffer
+
+        return self.read_method_body(CilMethodBodyReaderBuffer(bio))
+
+
+class LRUMethodBodyCache(MethodBodyCacheBase):
+    """cache decoded method bodies in memory, evicting the least recently used once maxsize are stored
+
+    entries are immutable encoded method bodies, so callers may modify the method bodies they are given without
+    affecting the cache. safe to share between threads
+    """
+
+    def __init__(self, maxsize: Optional[int] = 4096):
+        super().__init__()
+        self.maxsize: Optional[int] = maxsize
+        self.entries: collections.OrderedDict[bytes, bytes] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_data(self, digest: bytes) -> Optional[bytes]:
+        with self.lock:
+            data: Optional[bytes] = self.entries.get(digest)
+            if data is not None:
+                self.entries.move_to_end(digest)
+            return data
+
+    def put_data(self, digest: bytes, data: bytes):
+        if self.maxsize is not None and self.maxsize <= 0:
+            return
+
+        with self.lock:
+            self.entries[digest] = data
+            self.entries.move_to_end(digest)
+            if self.maxsize is not None and len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """remove all cached method bodies and reset hit and miss counters"""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class SqliteMethodBodyCache(MethodBodyCacheBase):
+    """cache decoded method bodies in a sqlite database on disk
+
+    writes are committed every commit_interval stored method bodies and on close; a connection must only be used
+    by the thread that opened it
+    """
+
+    def __init__(self, path: str, commit_interval: int = 1000):
+        super().__init__()
+        self.commit_interval: int = commit_interval
+        self.pending: int = 0
+
+        self.db: sqlite3.Connection = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS method_bodies (digest BLOB PRIMARY KEY, data BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.db.commit()
+
+    def __enter__(self) -> SqliteMethodBodyCache:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_data(self, digest: bytes) -> Optional[bytes]:
+        row = self.db.execute("SELECT data FROM method_bodies WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row is not None else None
+
+    def put_data(self, digest: bytes, data: bytes):
+        self.db.execute("INSERT OR REPLACE INTO method_bodies (digest, data) VALUES (?, ?)", (digest, data))
+        self.pending += 1
+        if self.pending >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        """commit stored method bodies to disk"""
+        self.db.commit()
+        self.pending = 0
+
+    def close(self):
+        """commit stored method bodies and close database"""
+        self.commit()
+        self.db.close()
@@ -0,0 +1,261 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import enum
+import array
+from typing import TYPE_CHECKING, Set, Dict, List, Tuple, Iterator, Sequence, cast
+
+if TYPE_CHECKING:
+    from dncil.cil.body import CilMethodBody
+    from dncil.cil.opcode import OpCode
+    from dncil.cil.exception import ExceptionHandler
+    from dncil.cil.instruction import Instruction
+
+from dncil.cil.enums import FlowControl, OpCodeValue, OperandType
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.columns import InstructionColumns, get_opcode
+
+
+class EdgeKind(enum.IntEnum):
+    """kind of control flow graph edge"""
+
+    # fall through to the next instruction
+    Next = 0
+    # branch, conditional branch, leave, or switch target
+    Branch = 1
+    # protected block to its handler or filter
+    Exception = 2
+
+
+def get_flow_control(opcode: OpCode) -> FlowControl:
+    """get flow control of opcode as seen by the control flow graph"""
+    if opcode.value == OpCodeValue.Jmp:
+        # jmp transfers control to another method, so the method does not continue after it
+        return FlowControl.Return
+    return opcode.flow_control
+
+
+def get_branch_info(body: CilMethodBody) -> Tuple[array.array, bytearray, Dict[int, List[int]]]:
+    """get IL offsets and flow control of instructions, and IL branch targets keyed by instruction index"""
+    offsets: array.array = array.array("I")
+    flows: bytearray = bytearray()
+    targets: Dict[int, List[int]] = {}
+
+    instructions: Sequence[Instruction] = body.instructions
+    if isinstance(instructions, InstructionColumns):
+        # read branch targets from the columns without building Instruction objects
+        offsets.extend(instructions.offsets)
+        for i, (value, operand_type, operand_value) in enumerate(
+            zip(instructions.opcodes, instructions.operand_types, instructions.operand_values)
+        ):
+            flows.append(get_flow_control(get_opcode(value)))
+            if operand_type == OperandType.InlineSwitch:
+                num_branches: int = instructions.switch_targets[operand_value]
+                targets[i] = instructions.switch_targets[operand_value + 1 : operand_value + 1 + num_branches].tolist()
+            elif operand_type in (OperandType.InlineBrTarget, OperandType.ShortInlineBrTarget):
+                targets[i] = [operand_value]
+        return offsets, flows, targets
+
+    code_offset: int = body.offset + body.header_size
+    for i, insn in enumerate(instructions):
+        offsets.append(insn.offset - code_offset)
+        flows.append(get_flow_control(insn.opcode))
+        if insn.opcode.operand_type == OperandType.InlineSwitch:
+            targets[i] = [target - code_offset for target in cast(List[int], insn.operand)]
+        elif insn.opcode.operand_type in (OperandType.InlineBrTarget, OperandType.ShortInlineBrTarget):
+            targets[i] = [cast(int, insn.operand) - code_offset]
+    return offsets, flows, targets
+
+
+def iter_handler_offsets(eh: ExceptionHandler) -> Iterator[Tuple[str, int, bool]]:
+    """get (name, IL offset, may be end of code) of block boundaries of exception handler"""
+    yield "try start", eh.try_start, False
+    yield "try end", eh.try_end, True
+    yield "handler start", eh.handler_start, False
+    yield "handler end", eh.handler_end, True
+    if eh.is_filter():
+        yield "filter start", eh.filter_start, False
+
+
+class ControlFlowGraph:
+    """store basic blocks of managed method code and the edges between them
+
+    blocks are numbered in code order; block i spans instruction indexes block_starts[i] to block_starts[i + 1].
+    edges are stored in compressed sparse row form: the successors of block i are
+    successors[successor_starts[i] : successor_starts[i + 1]], with the kind of each edge at the same index of
+    successor_kinds, and likewise for predecessors. blocks inside a protected block have an Exception edge to each
+    of its handlers and filters. the graph is built in time linear in the number of instructions and edges
+    """
+
+    def __init__(self, body: CilMethodBody):
+        self.body: CilMethodBody = body
+
+        # code offset, so blocks can be found by Instruction.offset
+        self.code_offset: int = body.offset + body.header_size
+
+        # IL offset of each instruction
+        self.offsets: array.array
+        # instruction index of the first instruction of each block, followed by the number of instructions
+        self.block_starts: array.array = array.array("I")
+        # block of each instruction
+        self.instruction_blocks: array.array = array.array("I")
+
+        self.successor_starts: array.array = array.array("I", [0])
+        self.successors: array.array = array.array("I")
+        self.successor_kinds: array.array = array.array("B")
+        self.predecessor_starts: array.array = array.array("I")
+        self.predecessors: array.array = array.array("I")
+        self.predecessor_kinds: array.array = array.array("B")
+
+        self.build()
+
+    def __len__(self) -> int:
+        return len(self.block_starts) - 1
+
+    def get_index(self, offset: int, index_of: Dict[int, int], what: str, is_end: bool = False) -> int:
+        """get instruction index by IL offset, which must be the start of an instruction, or the end of the code if
+        is_end is set"""
+        index: int = index_of.get(offset, -1)
+        if index < 0 or (index == len(self.offsets) and not is_end):
+            raise MethodBodyFormatError(
+                "%s 0x%X is not an instruction boundary of method body @ offset 0x%X" % (what, offset, self.body.offset)
+            )
+        return index
+
+    def build(self):
+        """split method code into basic blocks and connect them"""
+        offsets, flows, targets = get_branch_info(self.body)
+        self.offsets = offsets
+        num_insns: int = len(offsets)
+
+        # instruction index by IL offset; the end of the code maps to num_insns so ranges may end there
+        index_of: Dict[int, int] = {offset: i for i, offset in enumerate(offsets)}
+        index_of[self.body.code_size] = num_insns
+
+        # mark the first instruction of each block
+        leaders: bytearray = bytearray(num_insns + 1)
+        leaders[0] = 1
+        leaders[num_insns] = 1
+        for i, flow in enumerate(flows):
+            if flow in (FlowControl.Branch, FlowControl.Cond_Branch, FlowControl.Return, FlowControl.Throw):
+                leaders[i + 1] = 1
+        for i, branch_targets in targets.items():
+            for target in branch_targets:
+                leaders[self.get_index(target, index_of, "branch target")] = 1
+        for eh in self.body.exception_handlers:
+            for what, offset, is_end in iter_handler_offsets(eh):
+                leaders[self.get_index(offset, index_of, what, is_end)] = 1
+
+        block_starts: array.array = self.block_starts
+        instruction_blocks: array.array = self.instruction_blocks
+        for i in range(num_insns):
+            if leaders[i]:
+                block_starts.append(i)
+            instruction_blocks.append(len(block_starts) - 1)
+        block_starts.append(num_insns)
+        num_blocks: int = len(block_starts) - 1
+
+        # the block of the end of the code is num_blocks, so ranges may end there
+        instruction_blocks.append(num_blocks)
+
+        # exception edges from each block of a protected block to the handler, and to the filter if there is one
+        exception_targets: List[List[int]] = [[] for _ in range(num_blocks)]
+        for eh in self.body.exception_handlers:
+            handler_blocks: List[int] = [instruction_blocks[index_of[eh.handler_start]]]
+            if eh.is_filter():
+                handler_blocks.insert(0, instruction_blocks[index_of[eh.filter_start]])
+            for block in range(instruction_blocks[index_of[eh.try_start]], instruction_blocks[index_of[eh.try_end]]):
+                exception_targets[block].extend(handler_blocks)
+
+        successors: array.array = self.successors
+        successor_kinds: array.array = self.successor_kinds
+        for block in range(num_blocks):
+            last: int = block_starts[block + 1] - 1
+            flow: int = flows[last]
+
+            # a block may branch to the same block more than once, e.g. a switch; edges are stored once
+            seen: Set[int] = set()
+            if flow in (FlowControl.Branch, FlowControl.Cond_Branch):
+                for target in targets.get(last, ()):
+                    target_block: int = instruction_blocks[index_of[target]]
+                    if target_block not in seen:
+                        seen.add(target_block)
+                        successors.append(target_block)
+                        successor_kinds.append(EdgeKind.Branch)
+            if flow not in (FlowControl.Branch, FlowControl.Return, FlowControl.Throw) and block + 1 < num_blocks:
+                # falling off the end of the code is invalid and has no successor
+                if block + 1 not in seen:
+                    seen.add(block + 1)
+                    successors.append(block + 1)
+                    successor_kinds.append(EdgeKind.Next)
+            for target_block in exception_targets[block]:
+                if target_block not in seen:
+                    seen.add(target_block)
+                    successors.append(target_block)
+                    successor_kinds.append(EdgeKind.Exception)
+            self.successor_starts.append(len(successors))
+
+        # predecessors are the successor edges grouped by target block, using a counting sort
+        counts: List[int] = [0] * (num_blocks + 1)
+        for target_block in successors:
+            counts[target_block + 1] += 1
+        for block in range(num_blocks):
+            counts[block + 1] += counts[block]
+        self.predecessor_starts = array.array("I", counts)
+
+        fill: List[int] = counts[:num_blocks]
+        predecessors: List[int] = [0] * len(successors)
+        predecessor_kinds: List[int] = [0] * len(successors)
+        for block in range(num_blocks):
+            for edge in range(self.successor_starts[block], self.successor_starts[block + 1]):
+                target_block = successors[edge]
+                predecessors[fill[target_block]] = block
+                predecessor_kinds[fill[target_block]] = successor_kinds[edge]
+                fill[target_block] += 1
+        self.predecessors = array.array("I", predecessors)
+        self.predecessor_kinds = array.array("B", predecessor_kinds)
+
+    def get_successors(self, block: int) -> array.array:
+        """get successor blocks of block"""
+        return self.successors[self.successor_starts[block] : self.successor_starts[block + 1]]
+
+    def get_successor_kinds(self, block: int) -> array.array:
+        """get edge kind of each successor of block"""
+        return self.successor_kinds[self.successor_starts[block] : self.successor_starts[block + 1]]
+
+    def get_predecessors(self, block: int) -> array.array:
+        """get predecessor blocks of block"""
+        return self.predecessors[self.predecessor_starts[block] : self.predecessor_starts[block + 1]]
+
+    def get_predecessor_kinds(self, block: int) -> array.array:
+        """get edge kind of each predecessor of block"""
+        return self.predecessor_kinds[self.predecessor_starts[block] : self.predecessor_starts[block + 1]]
+
+    def iter_edges(self) -> Iterator[Tuple[int, int, EdgeKind]]:
+        """get (source block, target block, kind) of all edges"""
+        for block in range(len(self)):
+            for edge in range(self.successor_starts[block], self.successor_starts[block + 1]):
+                yield block, self.successors[edge], EdgeKind(self.successor_kinds[edge])
+
+    def get_instruction_indexes(self, block: int) -> range:
+        """get indexes of instructions of block in CilMethodBody.instructions"""
+        return range(self.block_starts[block], self.block_starts[block + 1])
+
+    def get_instructions(self, block: int) -> List[Instruction]:
+        """get instructions of block"""
+        return list(self.body.instructions[self.block_starts[block] : self.block_starts[block + 1]])
+
+    def get_block_offset(self, block: int) -> int:
+        """get offset of first instruction of block, as stored in Instruction.offset"""
+        return self.code_offset + self.offsets[self.block_starts[block]]
+
+    def get_block(self, index: int) -> int:
+        """get block containing instruction index"""
+        return self.instruction_blocks[index]
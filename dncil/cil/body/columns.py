@@ -0,0 +1,218 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import array
+import struct
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union, Optional, Sequence, cast, overload
+
+if TYPE_CHECKING:
+    import mmap
+
+from dncil.cil.enums import OpCodeValue, OperandType
+from dncil.cil.error import MethodBodyFormatError
+from dncil.clr.local import Local
+from dncil.cil.opcode import OpCode, OpCodes
+from dncil.clr.argument import Argument
+from dncil.cil.body.reader import (
+    INT64,
+    UINT32,
+    FLOAT32,
+    DOUBLE64,
+    CIL_OPCODES,
+    OPERAND_DECODERS,
+    ARGUMENT_OPCODE_VALUES,
+    OpCodeDecoder,
+    CilMethodBodyReaderBuffer,
+)
+from dncil.cil.instruction import Instruction
+
+
+def get_opcode(value: int) -> OpCode:
+    """get opcode by value"""
+    if value == OpCodeValue.UNKNOWN1:
+        return OpCodes.UNKNOWN1
+    elif value == OpCodeValue.UNKNOWN2:
+        return OpCodes.UNKNOWN2
+    elif value >> 8 == 0xFE:
+        return CIL_OPCODES.two_byte_op_codes[value & 0xFF]
+    else:
+        return CIL_OPCODES.one_byte_op_codes[value]
+
+
+class InstructionColumns(Sequence[Instruction]):
+    """store managed method instructions in parallel arrays
+
+    offsets and branch targets are IL offsets, i.e. relative to the start of the method code. operand_values holds
+    the integer operand of each instruction: token values, integer constants, variable indexes, branch targets,
+    the bit pattern of float constants, or for switch instructions the index of the branch target count in
+    switch_targets. branch targets are 64-bit as a 32-bit branch offset from the end of an instruction may exceed the
+    32-bit range. Instruction objects are only built when indexed
+    """
+
+    def __init__(self, code: bytes, code_offset: int):
+        self.code: bytes = code
+        self.code_offset: int = code_offset
+
+        self.offsets: array.array = array.array("I")
+        self.opcodes: array.array = array.array("H")
+        self.operand_types: array.array = array.array("B")
+        self.operand_values: array.array = array.array("q")
+        self.switch_targets: array.array = array.array("q")
+
+    @classmethod
+    def from_bytes(
+        cls, code: Union[bytes, bytearray, memoryview, mmap.mmap], code_offset: int = 0, code_size: Optional[int] = None
+    ) -> InstructionColumns:
+        """decode method code into instruction columns without building Instruction objects
+
+        instructions start in the first code_size bytes, by default all of code; as with the reader, the operand of
+        the last instruction may extend past code_size into the rest of code
+        """
+        buf: memoryview = memoryview(code).cast("B")
+        columns: InstructionColumns = cls(buf.tobytes(), code_offset)
+
+        one_byte_decoders, two_byte_decoders = cast(
+            Tuple[List[OpCodeDecoder], List[OpCodeDecoder]], CilMethodBodyReaderBuffer.get_opcode_decoders()
+        )
+        offsets_append = columns.offsets.append
+        opcodes_append = columns.opcodes.append
+        operand_types_append = columns.operand_types.append
+        operand_values_append = columns.operand_values.append
+
+        pos: int = 0
+        data_size: int = len(buf)
+        if code_size is None:
+            code_size = data_size
+
+        while pos < code_size:
+            try:
+                op_value: int = buf[pos]
+                if op_value == 0xFE:
+                    # 2-byte opcode
+                    opcode, decoder, _, is_branch, _ = two_byte_decoders[buf[pos + 1]]
+                else:
+                    # 1-byte opcode
+                    opcode, decoder, _, is_branch, _ = one_byte_decoders[op_value]
+            except IndexError:
+                raise MethodBodyFormatError("not enough data while parsing method code @ IL offset 0x%X" % pos)
+
+            operand_pos: int = pos + opcode.size
+            next_pos: int = operand_pos + opcode.operand_size
+            value: Any = 0
+
+            try:
+                if opcode.has_variable_operand:
+                    # switch count followed by a 4-byte branch offset per target
+                    num_branches: int = UINT32.unpack_from(buf, operand_pos)[0]
+                    if next_pos + num_branches * 4 > data_size:
+                        raise struct.error("switch exceeds method code")
+                    branches: tuple = struct.unpack_from("<%di" % num_branches, buf, next_pos)
+                    next_pos += num_branches * 4
+
+                    value = len(columns.switch_targets)
+                    columns.switch_targets.append(num_branches)
+                    columns.switch_targets.extend(next_pos + branch for branch in branches)
+                elif decoder is not None:
+                    value = decoder.unpack_from(buf, operand_pos)[0]
+                    if is_branch:
+                        value += next_pos
+                    elif decoder is DOUBLE64 or decoder is FLOAT32:
+                        # store float constants by bit pattern
+                        value = INT64.unpack(DOUBLE64.pack(value))[0]
+            except struct.error:
+                raise MethodBodyFormatError("not enough data while parsing method code @ IL offset 0x%X" % operand_pos)
+
+            offsets_append(pos)
+            opcodes_append(opcode.value)
+            operand_types_append(opcode.operand_type)
+            operand_values_append(value)
+
+            pos = next_pos
+
+        if pos > data_size:
+            raise MethodBodyFormatError("not enough data while parsing method code @ IL offset 0x%X" % data_size)
+
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> Instruction: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Instruction]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Instruction, List[Instruction]]:
+        if isinstance(index, slice):
+            return [self.get_instruction(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("instruction index out of range")
+        return self.get_instruction(index)
+
+    def get_offset(self, index: int) -> int:
+        """get instruction offset, as stored in Instruction.offset"""
+        return self.code_offset + self.offsets[index]
+
+    def get_operand(self, index: int) -> Any:
+        """get instruction operand, as stored in Instruction.operand"""
+        operand_type: int = self.operand_types[index]
+        value: int = self.operand_values[index]
+
+        if operand_type in (OperandType.InlineNone, OperandType.InlinePhi):
+            return None
+        elif operand_type == OperandType.InlineSwitch:
+            num_branches: int = self.switch_targets[value]
+            return [self.code_offset + target for target in self.switch_targets[value + 1 : value + 1 + num_branches]]
+        elif operand_type in (OperandType.InlineR, OperandType.ShortInlineR):
+            return DOUBLE64.unpack(INT64.pack(value))[0]
+
+        _, operand_cls, is_branch = OPERAND_DECODERS[cast(OperandType, operand_type)]
+        if is_branch:
+            return self.code_offset + value
+        elif operand_cls is Local and self.opcodes[index] in ARGUMENT_OPCODE_VALUES:
+            return Argument(value)
+        elif operand_cls is not None:
+            return operand_cls(value)
+        return value
+
+    def get_instruction(self, index: int) -> Instruction:
+        """build Instruction for index"""
+        insn: Instruction = Instruction()
+
+        insn.offset = self.code_offset + self.offsets[index]
+        insn.opcode = get_opcode(self.opcodes[index])
+        insn.operand = self.get_operand(index)
+        insn.size = insn.calc_size()
+
+        start: int = self.offsets[index]
+        insn.set_bytes(self.code, start, start + insn.opcode.size, start + insn.size)
+
+        return insn
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """get columns as NumPy arrays sharing memory with this object; requires numpy"""
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("numpy is required to convert instruction columns, install it with: pip install numpy")
+
+        return {
+            name: numpy.frombuffer(column, dtype=column.typecode)
+            for name, column in (
+                ("offsets", self.offsets),
+                ("opcodes", self.opcodes),
+                ("operand_types", self.operand_types),
+                ("operand_values", self.operand_values),
+                ("switch_targets", self.switch_targets),
+            )
+        }
@@ -0,0 +1,257 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import array
+from typing import TYPE_CHECKING, Set, Dict, List, Iterator, Optional
+
+if TYPE_CHECKING:
+    from dncil.cil.body.cfg import ControlFlowGraph
+
+from dncil.cil.body.cfg import EdgeKind
+
+
+def get_reverse_postorder(successors: List[List[int]], root: int) -> List[int]:
+    """get nodes reachable from root in reverse postorder of a depth-first search"""
+    postorder: List[int] = []
+    visited: bytearray = bytearray(len(successors))
+    visited[root] = 1
+
+    # (node, index of next successor to visit)
+    stack: List[List[int]] = [[root, 0]]
+    while stack:
+        top: List[int] = stack[-1]
+        node, i = top
+        if i < len(successors[node]):
+            top[1] += 1
+            successor: int = successors[node][i]
+            if not visited[successor]:
+                visited[successor] = 1
+                stack.append([successor, 0])
+        else:
+            stack.pop()
+            postorder.append(node)
+
+    postorder.reverse()
+    return postorder
+
+
+def get_immediate_dominators(successors: List[List[int]], predecessors: List[List[int]], root: int) -> List[int]:
+    """get immediate dominator of each node, root for root, or -1 if not reachable from root
+
+    uses the iterative algorithm of Cooper, Harvey, and Kennedy, "A Simple, Fast Dominance Algorithm": nodes are
+    visited in reverse postorder and dominators are intersected by walking up the partially built tree, which
+    converges in a few passes for the graphs compilers and obfuscators produce
+    """
+    order: List[int] = get_reverse_postorder(successors, root)
+    rpo_index: List[int] = [-1] * len(successors)
+    for i, node in enumerate(order):
+        rpo_index[node] = i
+
+    idoms: List[int] = [-1] * len(successors)
+    idoms[root] = root
+
+    changed: bool = True
+    while changed:
+        changed = False
+        for node in order[1:]:
+            new_idom: int = -1
+            for predecessor in predecessors[node]:
+                if idoms[predecessor] < 0:
+                    # not processed yet, or not reachable
+                    continue
+                if new_idom < 0:
+                    new_idom = predecessor
+                    continue
+
+                # walk both fingers up the tree to their nearest common dominator
+                a: int = predecessor
+                b: int = new_idom
+                while a != b:
+                    while rpo_index[a] > rpo_index[b]:
+                        a = idoms[a]
+                    while rpo_index[b] > rpo_index[a]:
+                        b = idoms[b]
+                new_idom = a
+
+            if idoms[node] != new_idom:
+                idoms[node] = new_idom
+                changed = True
+
+    return idoms
+
+
+class DominatorTree:
+    """store dominator tree, or post-dominator tree if post is set, of a control flow graph
+
+    all edges are followed, including exception edges, so handlers are dominated by the blocks that protect them.
+    post-dominators are computed against a virtual exit that follows every block without a Next or Branch successor,
+    e.g. ending in ret or throw; blocks that cannot reach it, such as infinite loops, have no post-dominators
+    """
+
+    def __init__(self, cfg: ControlFlowGraph, post: bool = False):
+        self.cfg: ControlFlowGraph = cfg
+        self.post: bool = post
+
+        # immediate (post-)dominator of each block, or -1 for the entry block, blocks immediately post-dominated by
+        # the exit, and unreachable blocks
+        self.idoms: array.array = array.array("i")
+
+        # preorder number of each node of the tree, and the largest preorder number in its subtree, so dominance is
+        # checked in constant time; node len(cfg) is the virtual exit at the root of the post-dominator tree
+        self.preorder: array.array = array.array("i")
+        self.subtree_ends: array.array = array.array("i")
+
+        self.children: List[List[int]] = []
+
+        self.build()
+
+    def __len__(self) -> int:
+        return len(self.cfg)
+
+    def build(self):
+        """compute (post-)dominators"""
+        cfg: ControlFlowGraph = self.cfg
+        num_blocks: int = len(cfg)
+        if not num_blocks:
+            return
+
+        successors: List[List[int]] = [cfg.get_successors(block).tolist() for block in range(num_blocks)]
+        predecessors: List[List[int]] = [cfg.get_predecessors(block).tolist() for block in range(num_blocks)]
+        root: int = 0
+
+        if self.post:
+            # reverse the graph and add the virtual exit
+            exit_blocks: List[int] = [
+                block
+                for block in range(num_blocks)
+                if all(kind == EdgeKind.Exception for kind in cfg.get_successor_kinds(block))
+            ]
+            successors, predecessors = predecessors + [exit_blocks], successors + [[]]
+            for block in exit_blocks:
+                predecessors[block].append(num_blocks)
+            root = num_blocks
+
+        idoms: List[int] = get_immediate_dominators(successors, predecessors, root)
+
+        self.children = [[] for _ in range(len(idoms))]
+        for node, idom in enumerate(idoms):
+            if idom >= 0 and node != root:
+                self.children[idom].append(node)
+
+        # number the tree depth-first, so a dominates b if b's interval lies within a's
+        self.preorder = array.array("i", [-1]) * len(idoms)
+        self.subtree_ends = array.array("i", [-1]) * len(idoms)
+        counter: int = 0
+        stack: List[List[int]] = [[root, 0]]
+        self.preorder[root] = counter
+        while stack:
+            top: List[int] = stack[-1]
+            node, i = top
+            if i < len(self.children[node]):
+                top[1] += 1
+                child: int = self.children[node][i]
+                counter += 1
+                self.preorder[child] = counter
+                stack.append([child, 0])
+            else:
+                stack.pop()
+                self.subtree_ends[node] = counter
+
+        # the entry block, and blocks immediately post-dominated by the virtual exit, have no immediate dominator
+        self.idoms = array.array(
+            "i", [-1 if node == root or idom == num_blocks else idom for node, idom in enumerate(idoms[:num_blocks])]
+        )
+
+    def is_reachable(self, block: int) -> bool:
+        """check if block is reachable from the entry block, or reaches the exit for a post-dominator tree"""
+        return self.preorder[block] >= 0
+
+    def get_idom(self, block: int) -> int:
+        """get immediate (post-)dominator of block, or -1"""
+        return self.idoms[block]
+
+    def get_children(self, block: int) -> List[int]:
+        """get blocks immediately (post-)dominated by block"""
+        return self.children[block]
+
+    def get_roots(self) -> List[int]:
+        """get blocks without an immediate (post-)dominator that are reachable"""
+        if self.post:
+            return self.children[len(self.cfg)] if self.children else []
+        return [0] if len(self.cfg) else []
+
+    def dominates(self, a: int, b: int) -> bool:
+        """check if block a (post-)dominates block b; every reachable block dominates itself"""
+        if self.preorder[a] < 0 or self.preorder[b] < 0:
+            return False
+        return self.preorder[a] <= self.preorder[b] <= self.subtree_ends[a]
+
+    def iter_dominators(self, block: int) -> Iterator[int]:
+        """get (post-)dominators of block, starting with block and ending with a root"""
+        if not self.is_reachable(block):
+            return
+        while block >= 0:
+            yield block
+            block = self.idoms[block]
+
+
+class NaturalLoop:
+    """store natural loop of a control flow graph: the blocks that reach a back edge without passing its header"""
+
+    __slots__ = ("header", "back_edges", "blocks")
+
+    def __init__(self, header: int):
+        self.header: int = header
+        # source blocks of edges to header from blocks it dominates
+        self.back_edges: List[int] = []
+        # blocks of loop in ascending order, including header
+        self.blocks: List[int] = []
+
+    def __str__(self) -> str:
+        return "loop with header %d, blocks %s" % (self.header, self.blocks)
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def __contains__(self, block: int) -> bool:
+        return block in self.blocks
+
+
+def find_natural_loops(cfg: ControlFlowGraph, dominators: Optional[DominatorTree] = None) -> List[NaturalLoop]:
+    """get natural loops of control flow graph, one per header, sorted by header
+
+    loops sharing a header are merged. the cost is proportional to the number of edges and the size of the loops found
+    """
+    if dominators is None:
+        dominators = DominatorTree(cfg)
+
+    loops: Dict[int, NaturalLoop] = {}
+    for block, target, _ in cfg.iter_edges():
+        if dominators.dominates(target, block):
+            if target not in loops:
+                loops[target] = NaturalLoop(target)
+            loops[target].back_edges.append(block)
+
+    for header, loop in loops.items():
+        # walk predecessors back from the back edges; the header stops the walk
+        blocks: Set[int] = {header}
+        worklist: List[int] = []
+        for source in loop.back_edges:
+            if source not in blocks:
+                blocks.add(source)
+                worklist.append(source)
+        while worklist:
+            for predecessor in cfg.get_predecessors(worklist.pop()):
+                if predecessor not in blocks and dominators.is_reachable(predecessor):
+                    blocks.add(predecessor)
+                    worklist.append(predecessor)
+        loop.blocks = sorted(blocks)
+
+    return [loops[header] for header in sorted(loops)]
@@ -14,6 +14,17 @@ from dncil.cil.enums import CorILMethod
 class CilMethodBodyFlags:
     """store maanged method body flags"""
 
+    __slots__ = (
+        "value",
+        "SmallFormat",
+        "TinyFormat",
+        "FatFormat",
+        "TinyFormat1",
+        "MoreSects",
+        "InitLocals",
+        "CompressedIL",
+    )
+
     def __init__(self, flags: int):
         self.value: int = flags
 
@@ -0,0 +1,84 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import mmap
+import functools
+from typing import TYPE_CHECKING, Any, List, Tuple, Callable, Iterable, Iterator, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+if TYPE_CHECKING:
+    from dncil.cil.body import CilMethodBody
+
+from dncil.cil.body.reader import iter_method_bodies
+
+# memory-mapped file shared by all tasks of a worker process; see init_buffer_worker
+worker_buf: Optional[mmap.mmap] = None
+
+
+def map_parallel(
+    func: Callable[[List[Any]], List[Any]],
+    items: Iterable[Any],
+    initializer: Callable,
+    initargs: Tuple,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 512,
+) -> Iterator[Any]:
+    """get results of func over chunks of items, run across a pool of worker processes, in item order
+
+    func and initializer must be module-level functions so they can be sent to the worker processes
+    """
+    items = list(items)
+    chunks: List[List[Any]] = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(
+        max_workers=max_workers, initializer=initializer, initargs=initargs
+    )
+    try:
+        for results in executor.map(func, chunks):
+            yield from results
+    finally:
+        # do not wait on chunks that are no longer needed, e.g. if the caller stops early
+        executor.shutdown(cancel_futures=True)
+
+
+def init_buffer_worker(path: str):
+    """map file once per worker process"""
+    global worker_buf
+    with open(path, "rb") as f:
+        worker_buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_buffer_chunk(offsets: List[int], skip_errors: bool = False) -> List[Tuple[int, CilMethodBody]]:
+    """read method bodies at offsets in the file mapped by the worker process"""
+    assert worker_buf is not None
+    return list(iter_method_bodies(worker_buf, offsets, columnar=True, skip_errors=skip_errors))
+
+
+def iter_method_bodies_parallel(
+    path: str,
+    offsets: Iterable[int],
+    max_workers: Optional[int] = None,
+    chunk_size: int = 512,
+    skip_errors: bool = False,
+) -> Iterator[Tuple[int, CilMethodBody]]:
+    """get (offset, method body) for each managed method body at file offsets in path, decoded across a pool of
+    worker processes
+
+    each worker maps the file once and decodes chunks of chunk_size offsets. method bodies are decoded with
+    columnar set so results are sent back as a few arrays per method instead of many Instruction objects
+    """
+    yield from map_parallel(
+        functools.partial(read_buffer_chunk, skip_errors=skip_errors),
+        offsets,
+        init_buffer_worker,
+        (path,),
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+    )
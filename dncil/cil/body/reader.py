@@ -11,25 +11,115 @@ from __future__ import annotations
 import io
 import abc
 import struct
-from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union, Callable, Optional, cast
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union, Callable, Iterable, Iterator, Optional, cast
 
 if TYPE_CHECKING:
-    from dncil.cil.opcode import OpCode
+    import mmap
 
 from dncil.cil.body import CilMethodBody
 from dncil.cil.error import MethodBodyFormatError
 from dncil.clr.local import Local
 from dncil.clr.token import Token, StringToken
-from dncil.cil.opcode import OpCodes, OpCodeValue, OperandType
+from dncil.cil.opcode import OpCode, OpCodes, OpCodeValue, OperandType
 from dncil.clr.argument import Argument
 from dncil.cil.instruction import Instruction
 
 CIL_OPCODES = OpCodes()
 
+# precompiled little-endian decoders, one per operand width
+UINT8: struct.Struct = struct.Struct("<B")
+INT8: struct.Struct = struct.Struct("<b")
+UINT16: struct.Struct = struct.Struct("<H")
+INT16: struct.Struct = struct.Struct("<h")
+UINT32: struct.Struct = struct.Struct("<I")
+INT32: struct.Struct = struct.Struct("<i")
+UINT64: struct.Struct = struct.Struct("<Q")
+INT64: struct.Struct = struct.Struct("<q")
+FLOAT32: struct.Struct = struct.Struct("<f")
+DOUBLE64: struct.Struct = struct.Struct("<d")
+
+DECODERS_BY_FORMAT: Dict[str, struct.Struct] = {
+    decoder.format: decoder for decoder in (UINT8, INT8, UINT16, INT16, UINT32, INT32, UINT64, INT64, FLOAT32, DOUBLE64)
+}
+
+
+# opcodes whose variable operand is a managed method argument rather than a local
+ARGUMENT_OPCODE_VALUES: Tuple[OpCodeValue, ...] = (
+    OpCodeValue.Ldarg,
+    OpCodeValue.Ldarg_S,
+    OpCodeValue.Ldarga,
+    OpCodeValue.Ldarga_S,
+    OpCodeValue.Starg,
+    OpCodeValue.Starg_S,
+)
+
+# operand reader method names keyed by operand type; resolved once per reader class, see get_operand_readers
+OPERAND_READER_NAMES: Dict[OperandType, str] = {
+    OperandType.InlineBrTarget: "read_inline_br_target",
+    OperandType.InlineField: "read_inline_field",
+    OperandType.InlineI: "read_inline_i",
+    OperandType.InlineI8: "read_inline_i8",
+    OperandType.InlineMethod: "read_inline_method",
+    OperandType.InlineNone: "read_inline_none",
+    OperandType.InlinePhi: "read_inline_phi",
+    OperandType.InlineR: "read_inline_r",
+    OperandType.InlineSig: "read_inline_sig",
+    OperandType.InlineString: "read_inline_string",
+    OperandType.InlineSwitch: "read_inline_switch",
+    OperandType.InlineTok: "read_inline_tok",
+    OperandType.InlineType: "read_inline_type",
+    OperandType.InlineVar: "read_inline_var",
+    OperandType.ShortInlineBrTarget: "read_short_inline_br_target",
+    OperandType.ShortInlineI: "read_short_inline_i",
+    OperandType.ShortInlineR: "read_short_inline_r",
+    OperandType.ShortInlineVar: "read_short_inline_var",
+}
+
+
+# operand decoders used by the table-driven decode loop, keyed by operand type: (decoder, operand class, is branch)
+OPERAND_DECODERS: Dict[OperandType, Tuple[struct.Struct, Optional[Callable], bool]] = {
+    OperandType.InlineBrTarget: (INT32, None, True),
+    OperandType.InlineField: (UINT32, Token, False),
+    OperandType.InlineI: (INT32, None, False),
+    OperandType.InlineI8: (INT64, None, False),
+    OperandType.InlineMethod: (UINT32, Token, False),
+    OperandType.InlineR: (DOUBLE64, None, False),
+    OperandType.InlineSig: (UINT32, Token, False),
+    OperandType.InlineString: (UINT32, StringToken, False),
+    OperandType.InlineTok: (UINT32, Token, False),
+    OperandType.InlineType: (UINT32, Token, False),
+    OperandType.InlineVar: (UINT16, Local, False),
+    OperandType.ShortInlineBrTarget: (INT8, None, True),
+    OperandType.ShortInlineI: (INT8, None, False),
+    OperandType.ShortInlineR: (FLOAT32, None, False),
+    OperandType.ShortInlineVar: (UINT8, Local, False),
+}
+
+# per-opcode entry used by the table-driven decode loop: (opcode, decoder, operand class, is branch, operand reader)
+OpCodeDecoder = Tuple[OpCode, Optional[struct.Struct], Optional[Callable], bool, Optional[Callable]]
+
 
 class CilMethodBodyReaderBase(abc.ABC):
     """abstract class for reading managed method body"""
 
+    # operand readers indexed by operand type, built once per class on first use; see get_operand_readers
+    operand_readers: List[Optional[Callable]]
+
+    @classmethod
+    def get_operand_readers(cls) -> List[Optional[Callable]]:
+        """get operand readers for this class indexed by operand type, so that per-instruction dispatch is a lookup"""
+        if "operand_readers" not in cls.__dict__:
+            cls.operand_readers = cls.build_operand_readers()
+        return cls.operand_readers
+
+    @classmethod
+    def build_operand_readers(cls) -> List[Optional[Callable]]:
+        """get operand readers for this class indexed by operand type, honoring subclass overrides"""
+        readers: List[Optional[Callable]] = [None] * (max(OperandType) + 1)
+        for operand_type, name in OPERAND_READER_NAMES.items():
+            readers[operand_type] = getattr(cls, name)
+        return readers
+
     @abc.abstractmethod
     def read(self, n: int) -> bytes:
         """get bytes from stream"""
@@ -45,70 +135,71 @@ class CilMethodBodyReaderBase(abc.ABC):
         """jump to stream to offset"""
         ...
 
+    def view(self, offset: int, n: int) -> Optional[memoryview]:
+        """get zero-copy view of n bytes at offset, or None if the stream does not support views"""
+        return None
+
     def _unpack(self, data_format: str) -> Tuple[Union[int, float], bytes]:
         """unpack bytes"""
-        unpack_size: int = struct.calcsize(data_format)
+        decoder: Optional[struct.Struct] = DECODERS_BY_FORMAT.get(data_format, None)
+        return self._unpack_struct(decoder if decoder is not None else struct.Struct(data_format))
+
+    def _unpack_struct(self, decoder: struct.Struct) -> Tuple[Union[int, float], bytes]:
+        """unpack bytes using precompiled decoder"""
         curr_off: int = self.tell()
         try:
-            unpack_bytes: bytes = self.read(unpack_size)
+            unpack_bytes: bytes = self.read(decoder.size)
         except Exception as e:
-            raise MethodBodyFormatError("unable to read 0x%X bytes @ offset 0x%X" % (unpack_size, curr_off))
-        if unpack_bytes == b"" or len(unpack_bytes) != unpack_size:
+            raise MethodBodyFormatError("unable to read 0x%X bytes @ offset 0x%X" % (decoder.size, curr_off))
+        if len(unpack_bytes) != decoder.size:
             raise MethodBodyFormatError(
                 "not enough data while parsing method body @ offset 0x%X" % (self.tell() - len(unpack_bytes))
             )
-        return struct.unpack(data_format, unpack_bytes)[0], unpack_bytes
+        return decoder.unpack(unpack_bytes)[0], unpack_bytes
 
     def is_arg_operand_instruction(self, insn: Instruction) -> bool:
         """check if instruction has a argument operand"""
-        return insn.opcode.value in (
-            OpCodeValue.Ldarg,
-            OpCodeValue.Ldarg_S,
-            OpCodeValue.Ldarga,
-            OpCodeValue.Ldarga_S,
-            OpCodeValue.Starg,
-            OpCodeValue.Starg_S,
-        )
+        return insn.opcode.value in ARGUMENT_OPCODE_VALUES
 
     def read_uint8(self) -> Tuple[int, bytes]:
         """get unsigned 8-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<B"))
+        return cast(Tuple[int, bytes], self._unpack_struct(UINT8))
 
     def read_int8(self) -> Tuple[int, bytes]:
         """get signed 8-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<b"))
+        return cast(Tuple[int, bytes], self._unpack_struct(INT8))
 
     def read_uint16(self) -> Tuple[int, bytes]:
         """get unsigned 16-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<H"))
+        return cast(Tuple[int, bytes], self._unpack_struct(UINT16))
 
     def read_int16(self) -> Tuple[int, bytes]:
         """get signed 16-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<h"))
+        return cast(Tuple[int, bytes], self._unpack_struct(INT16))
 
     def read_uint32(self) -> Tuple[int, bytes]:
         """get unsigned 32-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<I"))
+        return cast(Tuple[int, bytes], self._unpack_struct(UINT32))
 
     def read_int32(self) -> Tuple[int, bytes]:
         """get signed 32-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<i"))
+        return cast(Tuple[int, bytes], self._unpack_struct(INT32))
 
     def read_uint64(self) -> Tuple[int, bytes]:
         """get unsigned 64-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<Q"))
+        return cast(Tuple[int, bytes], self._unpack_struct(UINT64))
 
     def read_int64(self) -> Tuple[int, bytes]:
         """get signed 64-bit integer"""
-        return cast(Tuple[int, bytes], self._unpack("<q"))
+        return cast(Tuple[int, bytes], self._unpack_struct(INT64))
 
     def read_float32(self) -> Tuple[float, bytes]:
         """get 32-bit float"""
-        return self._unpack("<f")
+        return self._unpack_struct(FLOAT32)
 
     def read_double64(self) -> Tuple[float, bytes]:
         """get 64-bit float"""
-        return self._unpack("<d")
+        return self._unpack_struct(DOUBLE64)
 
     def read_inline_br_target(self, insn: Instruction) -> Tuple[int, bytes]:
         """get inline branch target"""
@@ -173,21 +264,21 @@ class CilMethodBodyReaderBase(abc.ABC):
     def read_inline_switch(self, insn: Instruction) -> Tuple[list, bytes]:
         """get inline switch + branch targets"""
         num_branches: int
-        branches_bytes: bytes
+        num_branches_bytes: bytes
 
-        num_branches, branches_bytes = self.read_uint32()
+        num_branches, num_branches_bytes = self.read_uint32()
         offset_after_insn: int = insn.offset + insn.opcode.size + 4 + num_branches * 4
 
-        branches: List[int] = []
-        for _ in range(num_branches):
-            branch_offset: int
-            branch_offset_raw: bytes
-
-            branch_offset, branch_offset_raw = self.read_int32()
-            branches.append(offset_after_insn + branch_offset)
-            branches_bytes += branch_offset_raw
+        # decode the branch offsets in one pass; obfuscated methods may contain switches with thousands of targets
+        branches_off: int = self.tell()
+        branches_bytes: bytes = self.read(num_branches * 4)
+        if len(branches_bytes) != num_branches * 4:
+            raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % branches_off)
 
-        return branches, branches_bytes
+        branches: List[int] = [
+            offset_after_insn + branch_offset for branch_offset in struct.unpack("<%di" % num_branches, branches_bytes)
+        ]
+        return branches, num_branches_bytes + branches_bytes
 
     def read_inline_tok(self, insn: Instruction) -> Tuple[Token, bytes]:
         """get inline managed token"""
@@ -253,12 +344,35 @@ class CilMethodBodyReaderBase(abc.ABC):
         """get instruction"""
         insn: Instruction = Instruction()
 
+        opcode_bytes: bytes
+        operand_bytes: bytes
+
         insn.offset = off
-        insn.opcode, insn.opcode_bytes = self.read_opcode()
-        insn.operand, insn.operand_bytes = self.read_operand(insn)
+        insn.opcode, opcode_bytes = self.read_opcode()
+
+        # store size at decode time; operand readers that calculate branch targets rely on it
+        insn.size = insn.opcode.size + insn.opcode.operand_size
+        insn.operand, operand_bytes = self.read_operand(insn)
+        if insn.opcode.has_variable_operand:
+            insn.size = insn.calc_size()
+
+        insn.set_bytes(opcode_bytes + operand_bytes, 0, len(opcode_bytes), len(opcode_bytes) + len(operand_bytes))
 
         return insn
 
+    def read_instructions(self, off: int, code_size: int) -> List[Instruction]:
+        """get instructions stored in the next code_size bytes"""
+        insns: List[Instruction] = []
+        code_end_offset: int = self.tell() + code_size
+
+        # instructions are stored sequentially so we just read through the stream
+        while self.tell() < code_end_offset:
+            insn: Instruction = self.read_instruction(off)
+            off += insn.size
+            insns.append(insn)
+
+        return insns
+
     def read_opcode(self) -> Tuple[OpCode, bytes]:
         """get instruction opcode"""
         op_value_first: int
@@ -292,32 +406,15 @@ class CilMethodBodyReaderBase(abc.ABC):
 
     def read_operand(self, insn: Instruction) -> Tuple[Union[Token, Local, Argument, list, float, int, None], bytes]:
         """get instruction operand"""
-        readers: Dict[OperandType, Callable] = {
-            OperandType.InlineBrTarget: self.read_inline_br_target,
-            OperandType.InlineField: self.read_inline_field,
-            OperandType.InlineI: self.read_inline_i,
-            OperandType.InlineI8: self.read_inline_i8,
-            OperandType.InlineMethod: self.read_inline_method,
-            OperandType.InlineNone: self.read_inline_none,
-            OperandType.InlinePhi: self.read_inline_phi,
-            OperandType.InlineR: self.read_inline_r,
-            OperandType.InlineSig: self.read_inline_sig,
-            OperandType.InlineString: self.read_inline_string,
-            OperandType.InlineSwitch: self.read_inline_switch,
-            OperandType.InlineTok: self.read_inline_tok,
-            OperandType.InlineType: self.read_inline_type,
-            OperandType.InlineVar: self.read_inline_var,
-            OperandType.ShortInlineBrTarget: self.read_short_inline_br_target,
-            OperandType.ShortInlineI: self.read_short_inline_i,
-            OperandType.ShortInlineR: self.read_short_inline_r,
-            OperandType.ShortInlineVar: self.read_short_inline_var,
-        }
-        reader: Optional[Callable] = readers.get(insn.opcode.operand_type, None)
+        try:
+            reader: Optional[Callable] = self.get_operand_readers()[insn.opcode.operand_type]
+        except IndexError:
+            reader = None
 
         if reader is None:
             raise MethodBodyFormatError("bad operand type 0x%02X" % insn.opcode.operand_type)
 
-        return reader(insn)
+        return reader(self, insn)
 
 
 class CilMethodBodyReaderBytes(CilMethodBodyReaderBase):
@@ -336,6 +433,256 @@ class CilMethodBodyReaderBytes(CilMethodBodyReaderBase):
         return self.stream.seek(loc)
 
 
-def read_method_body_from_bytes(bio: bytes) -> CilMethodBody:
+class CilMethodBodyReaderBuffer(CilMethodBodyReaderBase):
+    """buffer impl for abstract CilMethodBodyReaderBase
+
+    reads directly from bytes, bytearray, mmap, or memoryview objects through a memoryview and an integer cursor;
+    the underlying buffer is never copied. note that an mmap cannot be closed, nor a bytearray resized, while a reader
+    holds a view of it
+
+    method bodies copy their bytes by default so they do not hold the buffer once the reader is dropped; with zero_copy
+    set they reference their bytes in the buffer instead, holding it for as long as they exist
+    """
+
+    # table-driven decode loop entries, built once per class on first use; see get_opcode_decoders
+    opcode_decoders: Optional[Tuple[List[OpCodeDecoder], List[OpCodeDecoder]]]
+
+    def __init__(self, buf: Union[bytes, bytearray, memoryview, mmap.mmap], offset: int = 0, zero_copy: bool = False):
+        self.buf: memoryview = memoryview(buf).cast("B")
+        self.offset: int = offset
+        self.zero_copy: bool = zero_copy
+
+    def read(self, n: int) -> bytes:
+        data: bytes = self.buf[self.offset : self.offset + n].tobytes()
+        self.offset += len(data)
+        return data
+
+    def tell(self) -> int:
+        return self.offset
+
+    def seek(self, loc: int) -> int:
+        self.offset = loc
+        return self.offset
+
+    def view(self, offset: int, n: int) -> Optional[memoryview]:
+        if not self.zero_copy:
+            return None
+        return self.buf[offset : offset + n]
+
+    def _unpack_struct(self, decoder: struct.Struct) -> Tuple[Union[int, float], bytes]:
+        """unpack bytes in place using precompiled decoder"""
+        # unpack_from bounds checks the buffer for us so we only pay for a check when decoding fails
+        curr_off: int = self.offset
+        try:
+            value: Union[int, float] = decoder.unpack_from(self.buf, curr_off)[0]
+        except struct.error:
+            raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % curr_off)
+        self.offset = curr_off + decoder.size
+        return value, self.buf[curr_off : self.offset].tobytes()
+
+    def read_opcode(self) -> Tuple[OpCode, bytes]:
+        """get instruction opcode"""
+        # index the buffer directly; opcodes are read once per instruction so avoid the generic unpack path
+        curr_off: int = self.offset
+        opcode: OpCode
+
+        try:
+            op_value_first: int = self.buf[curr_off]
+            if op_value_first == 0xFE:
+                # 2-byte opcode
+                opcode = CIL_OPCODES.two_byte_op_codes[self.buf[curr_off + 1]]
+            else:
+                # 1-byte opcode
+                opcode = CIL_OPCODES.one_byte_op_codes[op_value_first]
+        except IndexError:
+            raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % curr_off)
+
+        self.offset = curr_off + opcode.size
+        return opcode, self.buf[curr_off : self.offset].tobytes()
+
+    @classmethod
+    def get_opcode_decoders(cls) -> Optional[Tuple[List[OpCodeDecoder], List[OpCodeDecoder]]]:
+        """get one-byte and two-byte opcode decoders for this class, or None if the generic decode loop is required"""
+        if "opcode_decoders" not in cls.__dict__:
+            cls.opcode_decoders = cls.build_opcode_decoders()
+        return cls.opcode_decoders
+
+    @classmethod
+    def build_opcode_decoders(cls) -> Optional[Tuple[List[OpCodeDecoder], List[OpCodeDecoder]]]:
+        """build opcode decoders, deferring to operand readers that subclasses override"""
+        for name in get_decode_method_names():
+            if getattr(cls, name) is not getattr(CilMethodBodyReaderBuffer, name):
+                # subclass changes how instructions or operands are read so the table-driven loop does not apply
+                return None
+
+        operand_readers: List[Optional[Callable]] = cls.get_operand_readers()
+
+        def build(opcode: OpCode) -> OpCodeDecoder:
+            reader: Optional[Callable] = operand_readers[opcode.operand_type]
+            if reader is not getattr(CilMethodBodyReaderBase, OPERAND_READER_NAMES[opcode.operand_type]):
+                # overridden operand reader
+                return opcode, None, None, False, reader
+            if opcode.operand_type in (OperandType.InlineNone, OperandType.InlinePhi):
+                return opcode, None, None, False, None
+            if opcode.operand_type not in OPERAND_DECODERS:
+                # variable-length operand
+                return opcode, None, None, False, reader
+
+            decoder, operand_cls, is_branch = OPERAND_DECODERS[opcode.operand_type]
+            if operand_cls is Local and opcode.value in ARGUMENT_OPCODE_VALUES:
+                operand_cls = Argument
+            return opcode, decoder, operand_cls, is_branch, None
+
+        return [build(opcode) for opcode in CIL_OPCODES.one_byte_op_codes], [
+            build(opcode) for opcode in CIL_OPCODES.two_byte_op_codes
+        ]
+
+    def read_instructions(self, off: int, code_size: int) -> List[Instruction]:
+        """get instructions stored in the next code_size bytes using a single table-driven pass"""
+        decoders: Optional[Tuple[List[OpCodeDecoder], List[OpCodeDecoder]]] = self.get_opcode_decoders()
+        if decoders is None:
+            return super().read_instructions(off, code_size)
+
+        one_byte_decoders, two_byte_decoders = decoders
+        buf: memoryview = self.buf
+        pos: int = self.offset
+        code_start_offset: int = pos
+        code_end_offset: int = pos + code_size
+        insns: List[Instruction] = []
+
+        # copy the method code once; instructions reference their bytes in it so the buffer itself is not held
+        code: bytes = buf[pos:code_end_offset].tobytes()
+
+        while pos < code_end_offset:
+            try:
+                op_value: int = buf[pos]
+                if op_value == 0xFE:
+                    # 2-byte opcode
+                    opcode, decoder, operand_cls, is_branch, reader = two_byte_decoders[buf[pos + 1]]
+                else:
+                    # 1-byte opcode
+                    opcode, decoder, operand_cls, is_branch, reader = one_byte_decoders[op_value]
+            except IndexError:
+                raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % pos)
+
+            operand_pos: int = pos + opcode.size
+            next_pos: int
+
+            insn: Instruction = Instruction()
+            insn.offset = off
+            insn.opcode = opcode
+            insn.size = opcode.size + opcode.operand_size
+
+            if reader is not None:
+                self.offset = operand_pos
+                insn.operand, _ = reader(self, insn)
+                next_pos = self.offset
+                if opcode.has_variable_operand:
+                    insn.size = insn.calc_size()
+            elif decoder is None:
+                insn.operand = None
+                next_pos = operand_pos
+            else:
+                # the only bounds check for this instruction, performed by unpack_from
+                try:
+                    value: Any = decoder.unpack_from(buf, operand_pos)[0]
+                except struct.error:
+                    raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % operand_pos)
+                next_pos = operand_pos + decoder.size
+                if is_branch:
+                    value += off + insn.size
+                insn.operand = operand_cls(value) if operand_cls is not None else value
+
+            if next_pos > code_end_offset:
+                # operand extends past the method code
+                insn.set_bytes(buf[pos:next_pos].tobytes(), 0, operand_pos - pos, next_pos - pos)
+            else:
+                insn.set_bytes(
+                    code, pos - code_start_offset, operand_pos - code_start_offset, next_pos - code_start_offset
+                )
+
+            off += insn.size
+            pos = next_pos
+            insns.append(insn)
+
+        self.offset = pos
+        return insns
+
+
+def get_decode_method_names() -> List[str]:
+    """get names of reader methods that the table-driven decode loop replaces, other than the operand readers, which
+    it calls when a subclass overrides them"""
+    names: List[str] = []
+    for reader_cls in (CilMethodBodyReaderBase, CilMethodBodyReaderBuffer):
+        for name, value in vars(reader_cls).items():
+            if not callable(value) or name.startswith("__") or name in names:
+                # classmethods, e.g. table builders, are not callable here
+                continue
+            if name in OPERAND_READER_NAMES.values() or name in ("read_instructions", "view"):
+                continue
+            names.append(name)
+    return names
+
+
+def read_method_body_from_bytes(bio: Union[bytes, bytearray, memoryview, mmap.mmap]) -> CilMethodBody:
     """read managed method body from byte stream"""
-    return CilMethodBody(CilMethodBodyReaderBytes(bio))
+    return CilMethodBody(CilMethodBodyReaderBuffer(bio))
+
+
+def iter_method_bodies(
+    buf: Union[bytes, bytearray, memoryview, mmap.mmap],
+    offsets: Iterable[int],
+    columnar: bool = False,
+    lazy: bool = False,
+    skip_errors: bool = False,
+    zero_copy: bool = False,
+) -> Iterator[Tuple[int, CilMethodBody]]:
+    """get (offset, method body) for each managed method body at offsets in buf, e.g. the file offsets of the
+    method bodies in a memory-mapped .NET file
+
+    all method bodies are decoded against a single shared reader so buf is never copied as a whole; each method body
+    copies its own bytes unless zero_copy is set, see CilMethodBodyReaderBuffer. lazy method bodies hold the reader, so
+    an mmap cannot be closed while they exist. with skip_errors set, method bodies that fail to parse are skipped
+    instead of raising MethodBodyFormatError; as lazy method bodies decode their instructions after they are yielded,
+    lazy and skip_errors cannot be combined
+    """
+    if lazy and skip_errors:
+        raise ValueError("skip_errors cannot skip instruction errors of lazy method bodies")
+
+    reader: CilMethodBodyReaderBuffer = CilMethodBodyReaderBuffer(buf, zero_copy=zero_copy)
+    buf_size: int = len(reader.buf)
+
+    for offset in offsets:
+        try:
+            if not 0 <= offset < buf_size:
+                raise MethodBodyFormatError("method body offset 0x%X is outside of buffer" % offset)
+            reader.seek(offset)
+            body: CilMethodBody = CilMethodBody(reader, columnar=columnar, lazy=lazy)
+        except MethodBodyFormatError:
+            if skip_errors:
+                continue
+            raise
+        yield offset, body
+
+
+def read_method_bodies(
+    buf: Union[bytes, bytearray, memoryview, mmap.mmap],
+    offsets: Iterable[int],
+    columnar: bool = False,
+    lazy: bool = False,
+    skip_errors: bool = False,
+    zero_copy: bool = False,
+) -> Dict[int, CilMethodBody]:
+    """get mapping of offset to method body for each managed method body at offsets in buf; see iter_method_bodies"""
+    return dict(
+        iter_method_bodies(buf, offsets, columnar=columnar, lazy=lazy, skip_errors=skip_errors, zero_copy=zero_copy)
+    )
+
+
+def iter_instructions(reader: CilMethodBodyReaderBase) -> Iterator[Instruction]:
+    """get instructions of the managed method body at the reader offset one at a time
+
+    only the method header and exception handlers are parsed up front; instructions are decoded as they are
+    requested and are not stored, so stopping early skips decoding the rest of the method
+    """
+    yield from CilMethodBody(reader, lazy=True).iter_instructions()
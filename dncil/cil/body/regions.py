@@ -0,0 +1,198 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import enum
+import array
+import bisect
+from typing import TYPE_CHECKING, List, Iterator, Optional
+
+if TYPE_CHECKING:
+    from dncil.cil.body import CilMethodBody
+    from dncil.cil.exception import ExceptionHandler
+
+
+class RegionKind(enum.IntEnum):
+    """kind of exception handling region"""
+
+    Try = 0
+    Handler = 1
+    Filter = 2
+
+
+class ExceptionRegion:
+    """store protected block, handler block, or filter block of an exception handler
+
+    start and end are IL offsets, as stored in ExceptionHandler; end is exclusive
+    """
+
+    __slots__ = ("kind", "start", "end", "handler", "handler_index", "parent")
+
+    def __init__(self, kind: RegionKind, start: int, end: int, handler: ExceptionHandler, handler_index: int):
+        self.kind: RegionKind = kind
+        self.start: int = start
+        self.end: int = end
+        self.handler: ExceptionHandler = handler
+        # index of handler in CilMethodBody.exception_handlers
+        self.handler_index: int = handler_index
+        # innermost region enclosing this region, or None
+        self.parent: Optional[ExceptionRegion] = None
+
+    def __str__(self) -> str:
+        return "%s of exception handler %d [0x%X, 0x%X)" % (self.kind.name, self.handler_index, self.start, self.end)
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def contains(self, il_offset: int) -> bool:
+        """check if region contains IL offset"""
+        return self.start <= il_offset < self.end
+
+
+class RegionIssueKind(enum.IntEnum):
+    """kind of malformed exception handling region"""
+
+    # region ends at or before its start
+    Empty = 0
+    # region ends after the method code
+    OutOfRange = 1
+    # region partially overlaps another region, so the regions do not nest
+    Overlap = 2
+
+
+class RegionIssue:
+    """store malformed exception handling region found while building a region tree"""
+
+    __slots__ = ("kind", "region", "other")
+
+    def __init__(self, kind: RegionIssueKind, region: ExceptionRegion, other: Optional[ExceptionRegion] = None):
+        self.kind: RegionIssueKind = kind
+        self.region: ExceptionRegion = region
+        # region partially overlapped by region
+        self.other: Optional[ExceptionRegion] = other
+
+    def __str__(self) -> str:
+        if self.kind == RegionIssueKind.Empty:
+            return "empty region: %s" % self.region
+        elif self.kind == RegionIssueKind.OutOfRange:
+            return "region exceeds method code: %s" % self.region
+        return "region %s overlaps %s" % (self.region, self.other)
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class ExceptionRegionTree:
+    """store try, handler, and filter regions of method body exception handlers as a nesting tree
+
+    the method code is split into segments at every region boundary, each mapped to the innermost region covering it,
+    so the innermost region at an offset is found by bisection and enclosing regions by following parents. protected
+    blocks shared by several exception handlers nest in the order of exception_handlers, so the first handler is
+    innermost, as the runtime searches them. empty, out of range, and partially overlapping regions are reported in
+    issues and left out of the tree
+    """
+
+    def __init__(self, body: CilMethodBody):
+        self.body: CilMethodBody = body
+
+        # code offset, so regions can be found by Instruction.offset
+        self.code_offset: int = body.offset + body.header_size
+
+        self.regions: List[ExceptionRegion] = []
+        self.issues: List[RegionIssue] = []
+
+        # IL offset of the start of each segment, and the innermost region covering it or None
+        self.segment_starts: array.array = array.array("I")
+        self.segment_regions: List[Optional[ExceptionRegion]] = []
+
+        self.build()
+
+    def build(self):
+        """build region tree"""
+        for i, eh in enumerate(self.body.exception_handlers):
+            self.regions.append(ExceptionRegion(RegionKind.Try, eh.try_start, eh.try_end, eh, i))
+            if eh.is_filter():
+                # the filter block runs up to the handler block
+                self.regions.append(ExceptionRegion(RegionKind.Filter, eh.filter_start, eh.handler_start, eh, i))
+            self.regions.append(ExceptionRegion(RegionKind.Handler, eh.handler_start, eh.handler_end, eh, i))
+
+        # outer regions sort before the regions they contain
+        regions: List[ExceptionRegion] = []
+        for region in sorted(self.regions, key=lambda r: (r.start, -r.end, -r.handler_index)):
+            if region.end <= region.start:
+                self.issues.append(RegionIssue(RegionIssueKind.Empty, region))
+            elif region.end > self.body.code_size:
+                self.issues.append(RegionIssue(RegionIssueKind.OutOfRange, region))
+            else:
+                regions.append(region)
+
+        # regions enclosing the current position, innermost last
+        stack: List[ExceptionRegion] = []
+        self.add_segment(0, None)
+        for region in regions:
+            while stack and stack[-1].end <= region.start:
+                self.pop_region(stack)
+
+            if stack and stack[-1].end < region.end:
+                self.issues.append(RegionIssue(RegionIssueKind.Overlap, region, stack[-1]))
+                continue
+
+            region.parent = stack[-1] if stack else None
+            stack.append(region)
+            self.add_segment(region.start, region)
+
+        while stack:
+            self.pop_region(stack)
+
+    def add_segment(self, il_offset: int, region: Optional[ExceptionRegion]):
+        """start segment at IL offset covered by innermost region"""
+        if self.segment_starts and self.segment_starts[-1] == il_offset:
+            # a segment of no length is replaced
+            self.segment_regions[-1] = region
+        else:
+            self.segment_starts.append(il_offset)
+            self.segment_regions.append(region)
+
+    def pop_region(self, stack: List[ExceptionRegion]):
+        """end innermost region on stack"""
+        region: ExceptionRegion = stack.pop()
+        self.add_segment(region.end, stack[-1] if stack else None)
+
+    def get_region_at(self, offset: int) -> Optional[ExceptionRegion]:
+        """get innermost region at offset, as stored in Instruction.offset, or None"""
+        il_offset: int = offset - self.code_offset
+        if il_offset < 0:
+            return None
+        return self.segment_regions[bisect.bisect_right(self.segment_starts, il_offset) - 1]
+
+    def iter_regions_at(self, offset: int) -> Iterator[ExceptionRegion]:
+        """get regions at offset, as stored in Instruction.offset, innermost first"""
+        region: Optional[ExceptionRegion] = self.get_region_at(offset)
+        while region is not None:
+            yield region
+            region = region.parent
+
+    def get_regions_at(self, offset: int) -> List[ExceptionRegion]:
+        """get regions at offset, as stored in Instruction.offset, innermost first"""
+        return list(self.iter_regions_at(offset))
+
+    def get_handlers_at(self, offset: int) -> List[ExceptionHandler]:
+        """get exception handlers protecting offset, as stored in Instruction.offset, in the order they are searched"""
+        return [region.handler for region in self.iter_regions_at(offset) if region.kind == RegionKind.Try]
+
+    def get_innermost_try_at(self, offset: int) -> Optional[ExceptionRegion]:
+        """get innermost protected block at offset, as stored in Instruction.offset, or None"""
+        for region in self.iter_regions_at(offset):
+            if region.kind == RegionKind.Try:
+                return region
+        return None
+
+    def is_valid(self) -> bool:
+        """check if all regions are well formed and nest"""
+        return not self.issues
@@ -0,0 +1,239 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import sys
+import array
+import struct
+from typing import List, Tuple, Union, BinaryIO, Optional
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.error import MethodBodyFormatError
+from dncil.clr.token import Token
+from dncil.cil.exception import ExceptionHandler
+from dncil.cil.body.flags import CilMethodBodyFlags
+from dncil.cil.body.columns import InstructionColumns
+
+MAGIC: bytes = b"dCIL"
+VERSION: int = 2
+
+# magic, version, operand value and switch target typecode, flags, header size, max stack, code size, local variable
+# signature token, offset, method body size, number of instructions, number of switch target entries, number of
+# exception handlers
+HEADER: struct.Struct = struct.Struct("<4sBcHHHIIQIIII")
+
+# exception type, try start, try end, filter start, handler start, handler end, catch type token or -1
+EXCEPTION_HANDLER: struct.Struct = struct.Struct("<Iqqqqqq")
+
+
+def get_columns(body: CilMethodBody) -> InstructionColumns:
+    """get instruction columns of method body, decoding method code again if instructions are not stored in columns"""
+    instructions = body.instructions
+    if isinstance(instructions, InstructionColumns):
+        return instructions
+    # the operand of the last instruction may extend past the method code
+    return InstructionColumns.from_bytes(
+        body.get_bytes_view()[body.header_size :], body.offset + body.header_size, body.code_size
+    )
+
+
+def dumps(body: CilMethodBody) -> bytes:
+    """get compact binary encoding of method body
+
+    instructions are stored as their decoded columns so loads does not decode method code again. operand values
+    and switch targets are stored as 32-bit integers if they all fit, otherwise as 64-bit integers
+
+    instructions that are not stored in columns are decoded again from the method body bytes, so the encoding holds
+    the operands the built-in decoder produces: operands changed by a reader subclass, e.g. one overriding
+    read_inline_method, or modified by the caller are not preserved
+    """
+    columns: InstructionColumns = get_columns(body)
+
+    operand_values: array.array = columns.operand_values
+    switch_targets: array.array = columns.switch_targets
+    if all(
+        not column or (min(column) >= -0x80000000 and max(column) <= 0x7FFFFFFF)
+        for column in (operand_values, switch_targets)
+    ):
+        operand_values = array.array("i", operand_values)
+        switch_targets = array.array("i", switch_targets)
+
+    arrays: List[array.array] = [
+        columns.offsets,
+        columns.opcodes,
+        columns.operand_types,
+        operand_values,
+        switch_targets,
+    ]
+    if sys.byteorder != "little":
+        arrays = [array.array(column.typecode, column) for column in arrays]
+        for column in arrays:
+            column.byteswap()
+
+    raw_bytes: bytes = body.get_bytes()
+    parts: List[bytes] = [
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            operand_values.typecode.encode(),
+            body.flags.value,
+            body.header_size,
+            body.max_stack,
+            body.code_size,
+            body.local_var_sig_tok.value if body.local_var_sig_tok is not None else 0,
+            body.offset,
+            len(raw_bytes),
+            len(columns),
+            len(columns.switch_targets),
+            len(body.exception_handlers),
+        ),
+        raw_bytes,
+    ]
+    parts.extend(column.tobytes() for column in arrays)
+    parts.extend(
+        EXCEPTION_HANDLER.pack(
+            eh.exception_type,
+            eh.try_start,
+            eh.try_end,
+            eh.filter_start,
+            eh.handler_start,
+            eh.handler_end,
+            eh.catch_type.value if eh.catch_type is not None else -1,
+        )
+        for eh in body.exception_handlers
+    )
+
+    return b"".join(parts)
+
+
+def get_size(header: Tuple) -> int:
+    """get size of encoded method body from unpacked header"""
+    itemsize: int = array.array(header[2].decode()).itemsize
+    size, num_insns, num_switch_targets, num_exception_handlers = header[9:]
+    return (
+        HEADER.size
+        + size
+        + num_insns * (4 + 2 + 1 + itemsize)
+        + num_switch_targets * itemsize
+        + num_exception_handlers * EXCEPTION_HANDLER.size
+    )
+
+
+def unpack_header(data: Union[bytes, memoryview]) -> Tuple:
+    """get header of encoded method body"""
+    try:
+        header: Tuple = HEADER.unpack_from(data)
+    except struct.error:
+        raise MethodBodyFormatError("not enough data while loading method body")
+    if header[0] != MAGIC:
+        raise MethodBodyFormatError("bad method body encoding magic %r" % header[0])
+    if header[1] != VERSION:
+        raise MethodBodyFormatError("unsupported method body encoding version %d" % header[1])
+    if header[2] not in (b"i", b"q"):
+        raise MethodBodyFormatError("bad method body encoding operand typecode %r" % header[2])
+    return header
+
+
+def loads(data: Union[bytes, bytearray, memoryview], offset: Optional[int] = None) -> CilMethodBody:
+    """get method body from binary encoding created by dumps
+
+    offset relocates the method body, e.g. to load a method body shared by several files; instruction offsets and
+    branch targets follow. the returned method body stores its instructions in columns
+    """
+    buf: memoryview = memoryview(data).cast("B")
+    header: Tuple = unpack_header(buf)
+    if len(buf) < get_size(header):
+        raise MethodBodyFormatError("not enough data while loading method body")
+
+    (
+        _,
+        _,
+        typecode,
+        flags,
+        header_size,
+        max_stack,
+        code_size,
+        local_var_sig_tok,
+        body_offset,
+        size,
+        num_insns,
+        num_switch_targets,
+        num_exception_handlers,
+    ) = header
+
+    body: CilMethodBody = CilMethodBody.__new__(CilMethodBody)
+    body.offset = body_offset if offset is None else offset
+    body.header_size = header_size
+    body.flags = CilMethodBodyFlags(flags)
+    body.max_stack = max_stack
+    body.code_size = code_size
+    body.local_var_sig_tok = Token(local_var_sig_tok) if local_var_sig_tok else None
+    body.size = size
+    body.exception_handlers_size = size - header_size - code_size
+    body.columnar = True
+    body.exception_handlers = []
+    body._raw_view = None
+    body._reader = None
+    body._instruction_offsets = None
+
+    pos: int = HEADER.size
+    body._raw_bytes = buf[pos : pos + size].tobytes()
+    pos += size
+
+    def read_column(column_typecode: str, count: int) -> array.array:
+        # columns are stored little-endian, in order, after the method body bytes
+        nonlocal pos
+        column: array.array = array.array(column_typecode)
+        column.frombytes(buf[pos : pos + count * column.itemsize])
+        if sys.byteorder != "little":
+            column.byteswap()
+        pos += count * column.itemsize
+        return column
+
+    # instruction bytes may extend past the method code, see InstructionColumns.from_bytes
+    columns: InstructionColumns = InstructionColumns(body._raw_bytes[header_size:], body.offset + header_size)
+    columns.offsets = read_column("I", num_insns)
+    columns.opcodes = read_column("H", num_insns)
+    columns.operand_types = read_column("B", num_insns)
+    columns.operand_values = read_column(typecode.decode(), num_insns)
+    if columns.operand_values.typecode != "q":
+        columns.operand_values = array.array("q", columns.operand_values)
+    columns.switch_targets = read_column(typecode.decode(), num_switch_targets)
+    if columns.switch_targets.typecode != "q":
+        columns.switch_targets = array.array("q", columns.switch_targets)
+    body._instructions = columns
+
+    for _ in range(num_exception_handlers):
+        exception_type, try_start, try_end, filter_start, handler_start, handler_end, catch_type = (
+            EXCEPTION_HANDLER.unpack_from(buf, pos)
+        )
+        pos += EXCEPTION_HANDLER.size
+
+        eh: ExceptionHandler = ExceptionHandler(exception_type)
+        eh.try_start = try_start
+        eh.try_end = try_end
+        eh.filter_start = filter_start
+        eh.handler_start = handler_start
+        eh.handler_end = handler_end
+        eh.catch_type = Token(catch_type) if catch_type != -1 else None
+        body.exception_handlers.append(eh)
+
+    return body
+
+
+def dump(body: CilMethodBody, f: BinaryIO):
+    """write binary encoding of method body to file; encodings are self-delimiting so bodies can be appended"""
+    f.write(dumps(body))
+
+
+def load(f: BinaryIO, offset: Optional[int] = None) -> CilMethodBody:
+    """read next method body encoded by dump from file"""
+    data: bytes = f.read(HEADER.size)
+    data += f.read(get_size(unpack_header(data)) - HEADER.size)
+    return loads(data, offset)
@@ -0,0 +1,198 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import enum
+import array
+from typing import TYPE_CHECKING, Dict, List, Tuple, Callable, Optional, Sequence
+
+if TYPE_CHECKING:
+    from dncil.cil.body import CilMethodBody
+    from dncil.cil.opcode import OpCode
+    from dncil.cil.instruction import Instruction
+
+from dncil.cil.enums import StackBehaviour
+from dncil.cil.body.cfg import EdgeKind, ControlFlowGraph
+
+# get (values popped, values pushed) by a call, callvirt, calli, newobj, or ret instruction from its signature:
+# arguments including this and, for calli, the function pointer, and 1 if the return type is not void. ret is given
+# the instruction only, so the resolver must know the return type of the method being analyzed
+StackResolver = Callable[["Instruction"], Tuple[int, int]]
+
+# values popped by fixed stack behaviours; PopAll empties the stack
+STACK_POPS: Dict[StackBehaviour, int] = {
+    StackBehaviour.Pop0: 0,
+    StackBehaviour.Pop1: 1,
+    StackBehaviour.Pop1_pop1: 2,
+    StackBehaviour.Popi: 1,
+    StackBehaviour.Popi_pop1: 2,
+    StackBehaviour.Popi_popi: 2,
+    StackBehaviour.Popi_popi8: 2,
+    StackBehaviour.Popi_popi_popi: 3,
+    StackBehaviour.Popi_popr4: 2,
+    StackBehaviour.Popi_popr8: 2,
+    StackBehaviour.Popref: 1,
+    StackBehaviour.Popref_pop1: 2,
+    StackBehaviour.Popref_popi: 2,
+    StackBehaviour.Popref_popi_popi: 3,
+    StackBehaviour.Popref_popi_popi8: 3,
+    StackBehaviour.Popref_popi_popr4: 3,
+    StackBehaviour.Popref_popi_popr8: 3,
+    StackBehaviour.Popref_popi_popref: 3,
+    StackBehaviour.Popref_popi_pop1: 3,
+}
+
+# values pushed by fixed stack behaviours
+STACK_PUSHES: Dict[StackBehaviour, int] = {
+    StackBehaviour.Push0: 0,
+    StackBehaviour.Push1: 1,
+    StackBehaviour.Push1_push1: 2,
+    StackBehaviour.Pushi: 1,
+    StackBehaviour.Pushi8: 1,
+    StackBehaviour.Pushr4: 1,
+    StackBehaviour.Pushr8: 1,
+    StackBehaviour.Pushref: 1,
+}
+
+
+class StackIssueKind(enum.IntEnum):
+    """kind of problem found by stack depth analysis"""
+
+    # instruction pops more values than the stack holds
+    Underflow = 0
+    # block is reached with different stack depths
+    Mismatch = 1
+    # stack depth exceeds max_stack of the method header
+    MaxStack = 2
+
+
+class StackIssue:
+    """store problem found by stack depth analysis"""
+
+    __slots__ = ("kind", "offset", "expected", "actual")
+
+    def __init__(self, kind: StackIssueKind, offset: int, expected: int, actual: int):
+        self.kind: StackIssueKind = kind
+        # instruction offset, as stored in Instruction.offset
+        self.offset: int = offset
+        self.expected: int = expected
+        self.actual: int = actual
+
+    def __str__(self) -> str:
+        if self.kind == StackIssueKind.Underflow:
+            return "stack underflow @ offset 0x%X: pops %d, stack depth %d" % (self.offset, self.actual, self.expected)
+        elif self.kind == StackIssueKind.Mismatch:
+            return "stack depth mismatch @ offset 0x%X: %d and %d" % (self.offset, self.expected, self.actual)
+        return "stack depth exceeds max stack @ offset 0x%X: %d > %d" % (self.offset, self.actual, self.expected)
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+def get_stack_usage(insn: Instruction, resolver: StackResolver) -> Tuple[int, int]:
+    """get (values popped, values pushed) by instruction; PopAll pops -1"""
+    opcode: OpCode = insn.opcode
+    pops: int = -1 if opcode.stack_pop == StackBehaviour.PopAll else STACK_POPS.get(opcode.stack_pop, 0)
+    pushes: int = STACK_PUSHES.get(opcode.stack_push, 0)
+
+    if opcode.stack_pop == StackBehaviour.Varpop or opcode.stack_push == StackBehaviour.Varpush:
+        var_pops, var_pushes = resolver(insn)
+        if opcode.stack_pop == StackBehaviour.Varpop:
+            pops = var_pops
+        if opcode.stack_push == StackBehaviour.Varpush:
+            pushes = var_pushes
+    return pops, pushes
+
+
+class StackAnalysis:
+    """compute the evaluation stack depth before each instruction of a method body
+
+    blocks are visited once by a worklist over the control flow graph, so the analysis is linear in the number of
+    instructions and edges. handlers start with the exception object on the stack, or empty for finally and fault
+    handlers. a block reached again with a different depth, a pop from a stack that is too shallow, and a depth above
+    max_stack are reported in issues; analysis continues with the first depth seen, or an empty stack on underflow
+    """
+
+    def __init__(self, body: CilMethodBody, resolver: StackResolver, cfg: Optional[ControlFlowGraph] = None):
+        self.body: CilMethodBody = body
+        self.cfg: ControlFlowGraph = cfg if cfg is not None else ControlFlowGraph(body)
+
+        # stack depth before each instruction, or -1 if the instruction is not reachable
+        self.depths: array.array = array.array("i", [-1]) * len(self.cfg.offsets)
+        self.max_depth: int = 0
+        self.issues: List[StackIssue] = []
+
+        self.analyze(resolver)
+
+    def analyze(self, resolver: StackResolver):
+        """compute stack depths"""
+        cfg: ControlFlowGraph = self.cfg
+        if not len(cfg):
+            return
+
+        # stack depth on entry to each block, or -1 until the block is reached
+        entry_depths: List[int] = [-1] * len(cfg)
+        worklist: List[int] = []
+
+        def reach(block: int, depth: int):
+            if entry_depths[block] < 0:
+                entry_depths[block] = depth
+                worklist.append(block)
+            elif entry_depths[block] != depth:
+                self.issues.append(
+                    StackIssue(StackIssueKind.Mismatch, cfg.get_block_offset(block), entry_depths[block], depth)
+                )
+
+        reach(0, 0)
+        for eh in self.body.exception_handlers:
+            # exception handlers are entered with only the exception object on the stack
+            depth: int = 0 if eh.is_finally() or eh.is_fault() else 1
+            reach(cfg.get_block(self.body.index_of(cfg.code_offset + eh.handler_start)), depth)
+            if eh.is_filter():
+                reach(cfg.get_block(self.body.index_of(cfg.code_offset + eh.filter_start)), 1)
+
+        instructions: Sequence[Instruction] = self.body.instructions
+        depths: array.array = self.depths
+        max_stack: int = self.body.max_stack
+        while worklist:
+            block: int = worklist.pop()
+            depth = entry_depths[block]
+
+            for index in cfg.get_instruction_indexes(block):
+                depths[index] = depth
+                insn: Instruction = instructions[index]
+                pops, pushes = get_stack_usage(insn, resolver)
+
+                if pops < 0:
+                    depth = 0
+                elif pops > depth:
+                    self.issues.append(StackIssue(StackIssueKind.Underflow, insn.offset, depth, pops))
+                    depth = 0
+                else:
+                    depth -= pops
+                depth += pushes
+
+                if depth > self.max_depth:
+                    if depth > max_stack and self.max_depth <= max_stack:
+                        # reported once, at the first instruction found to exceed max_stack
+                        self.issues.append(StackIssue(StackIssueKind.MaxStack, insn.offset, max_stack, depth))
+                    self.max_depth = depth
+
+            for target, kind in zip(cfg.get_successors(block), cfg.get_successor_kinds(block)):
+                # handlers are entered with a fixed stack depth, set above
+                if kind != EdgeKind.Exception:
+                    reach(target, depth)
+
+    def get_depth(self, offset: int) -> int:
+        """get stack depth before instruction at offset, as stored in Instruction.offset, or -1 if unreachable"""
+        return self.depths[self.body.index_of(offset)]
+
+    def check_max_stack(self) -> bool:
+        """check if max_stack of the method header covers the computed stack depth"""
+        return self.max_depth <= self.body.max_stack
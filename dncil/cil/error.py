@@ -13,6 +13,7 @@ class MethodBodyFormatError(Exception):
     """generic method body format exception"""
 
     def __init__(self, value: str):
+        super().__init__(value)
         self.value: str = value
 
     def __str__(self) -> str:
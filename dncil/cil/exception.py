@@ -19,6 +19,16 @@ if TYPE_CHECKING:
 class ExceptionHandler:
     """store managed method exception handler"""
 
+    __slots__ = (
+        "exception_type",
+        "try_start",
+        "try_end",
+        "filter_start",
+        "handler_start",
+        "handler_end",
+        "catch_type",
+    )
+
     TINY_SIZE = 12
     FAT_SIZE = 24
 
@@ -10,7 +10,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, Union, Optional, cast
 
-from dncil.cil.enums import OpCodeValue, OperandType
+from dncil.cil.enums import OpCodeValue
 
 if TYPE_CHECKING:
     from dncil.clr.local import Local
@@ -22,12 +22,19 @@ if TYPE_CHECKING:
 class Instruction:
     """store managed instruction"""
 
+    __slots__ = ("offset", "opcode", "operand", "_size", "_buf", "_start", "_operand_start", "_end")
+
     def __init__(self):
         self.offset: int
         self.opcode: OpCode
-        self.opcode_bytes: bytes
         self.operand: Union[Token, Local, Argument, list, int, float, None]
-        self.operand_bytes: bytes
+        self._size: Optional[int] = None
+
+        # instruction bytes are a range of a buffer that is typically shared by all instructions of a method
+        self._buf: bytes = b""
+        self._start: int = 0
+        self._operand_start: int = 0
+        self._end: int = 0
 
     def __str__(self) -> str:
         return (
@@ -52,38 +59,49 @@ class Instruction:
     @property
     def size(self) -> int:
         """get instruction size"""
-        opcode: OpCode = self.opcode
-
-        if opcode.operand_type in (
-            OperandType.InlineBrTarget,
-            OperandType.InlineField,
-            OperandType.InlineI,
-            OperandType.InlineMethod,
-            OperandType.InlineSig,
-            OperandType.InlineString,
-            OperandType.InlineTok,
-            OperandType.InlineType,
-            OperandType.ShortInlineR,
-        ):
-            return opcode.size + 4
-
-        elif opcode.operand_type in (OperandType.InlineI8, OperandType.InlineR):
-            return opcode.size + 8
-        elif opcode.operand_type in (OperandType.InlineSwitch,):
+        if self._size is None:
+            # instruction was not built by a reader, calculate the size from the opcode
+            return self.calc_size()
+        return self._size
+
+    @size.setter
+    def size(self, value: int):
+        self._size = value
+
+    @property
+    def opcode_bytes(self) -> bytes:
+        """get instruction opcode bytes"""
+        return self._buf[self._start : self._operand_start]
+
+    @opcode_bytes.setter
+    def opcode_bytes(self, value: bytes):
+        self.set_bytes(value + self.operand_bytes, 0, len(value), len(value) + self._end - self._operand_start)
+
+    @property
+    def operand_bytes(self) -> bytes:
+        """get instruction operand bytes"""
+        return self._buf[self._operand_start : self._end]
+
+    @operand_bytes.setter
+    def operand_bytes(self, value: bytes):
+        opcode_bytes: bytes = self.opcode_bytes
+        self.set_bytes(opcode_bytes + value, 0, len(opcode_bytes), len(opcode_bytes) + len(value))
+
+    def set_bytes(self, buf: bytes, start: int, operand_start: int, end: int):
+        """set instruction bytes to buf[start:end], with the operand starting at operand_start; buf is not copied"""
+        self._buf = buf
+        self._start = start
+        self._operand_start = operand_start
+        self._end = end
+
+    def calc_size(self) -> int:
+        """calculate instruction size from opcode and operand"""
+        size: int = self.opcode.size + self.opcode.operand_size
+        if self.opcode.has_variable_operand:
+            # switch count is followed by a 4-byte branch offset per target
             targets = cast(list, self.operand)
-            return opcode.size + 4 + (len(targets) * 4 if targets else 0)
-        elif opcode.operand_type in (OperandType.InlineVar,):
-            return opcode.size + 2
-        elif opcode.operand_type in (
-            OperandType.ShortInlineBrTarget,
-            OperandType.ShortInlineI,
-            OperandType.ShortInlineVar,
-        ):
-            return opcode.size + 1
-        elif opcode.operand_type in (OperandType.InlineNone, OperandType.InlinePhi):
-            return opcode.size
-        else:
-            return opcode.size
+            size += len(targets) * 4 if targets else 0
+        return size
 
     def get_mnemonic(self) -> str:
         """get instruction mnemonic"""
@@ -95,15 +113,19 @@ class Instruction:
 
     def get_opcode_size(self) -> int:
         """get instruction opcode size"""
-        return len(self.opcode_bytes)
+        return self._operand_start - self._start
 
     def get_operand_size(self) -> int:
         """get instruction operand size"""
-        return len(self.operand_bytes)
+        return self._end - self._operand_start
 
     def get_bytes(self) -> bytes:
         """get instruction bytes"""
-        return self.opcode_bytes + self.operand_bytes
+        return self._buf[self._start : self._end]
+
+    def get_bytes_view(self) -> memoryview:
+        """get zero-copy view of instruction bytes"""
+        return memoryview(self._buf)[self._start : self._end]
 
     def get_opcode_bytes(self) -> bytes:
         """get instruction opcode bytes"""
@@ -8,11 +8,33 @@
 
 from __future__ import annotations
 
-import inspect
-from typing import List
+from typing import Dict, List
 
 from dncil.cil.enums import *
 
+# fixed operand size in bytes by operand type; InlineSwitch is variable-length so only its 4-byte count is fixed
+OPERAND_SIZES: Dict[OperandType, int] = {
+    OperandType.InlineBrTarget: 4,
+    OperandType.InlineField: 4,
+    OperandType.InlineI: 4,
+    OperandType.InlineI8: 8,
+    OperandType.InlineMethod: 4,
+    OperandType.InlineNone: 0,
+    OperandType.InlinePhi: 0,
+    OperandType.InlineR: 8,
+    OperandType.NOT_USED_8: 0,
+    OperandType.InlineSig: 4,
+    OperandType.InlineString: 4,
+    OperandType.InlineSwitch: 4,
+    OperandType.InlineTok: 4,
+    OperandType.InlineType: 4,
+    OperandType.InlineVar: 2,
+    OperandType.ShortInlineBrTarget: 1,
+    OperandType.ShortInlineI: 1,
+    OperandType.ShortInlineR: 4,
+    OperandType.ShortInlineVar: 1,
+}
+
 
 class OpCode:
     """store managed opcode"""
@@ -35,10 +57,12 @@ class OpCode:
         self.stack_push: StackBehaviour = stack_push
         self.stack_pop: StackBehaviour = stack_pop
 
-    @property
-    def size(self) -> int:
-        """get opcode size"""
-        return 1 if self.value < 0x100 or self.value == OpCodeValue.UNKNOWN1 else 2
+        # opcode size, precomputed as it is needed for every decoded instruction
+        self.size: int = 1 if value < 0x100 or value == OpCodeValue.UNKNOWN1 else 2
+
+        # fixed operand size; variable-length operands (InlineSwitch) are followed by 4 bytes per branch target
+        self.operand_size: int = OPERAND_SIZES.get(operand_type, 0)
+        self.has_variable_operand: bool = operand_type == OperandType.InlineSwitch
 
     def __str__(self) -> str:
         return self.name
@@ -2114,11 +2138,94 @@ class OpCodes:
 
     def __init__(self):
         # group opcodes by size; used to parse instructions later
-        self.one_byte_op_codes: List[OpCode] = [OpCodes.UNKNOWN1] * 0x100
-        self.two_byte_op_codes: List[OpCode] = [OpCodes.UNKNOWN2] * 0x100
+        self.one_byte_op_codes: List[OpCode] = list(ONE_BYTE_OP_CODES)
+        self.two_byte_op_codes: List[OpCode] = list(TWO_BYTE_OP_CODES)
+
+
+# opcodes by value, one-byte opcodes by byte and two-byte opcodes (0xFE prefix) by second byte. these tables are
+# written out rather than collected from the OpCodes members at import; tests check that they match
+# fmt: off
+ONE_BYTE_OP_CODES: List[OpCode] = (
+    [
+        OpCodes.Nop, OpCodes.Break, OpCodes.Ldarg_0, OpCodes.Ldarg_1,  # 0x00
+        OpCodes.Ldarg_2, OpCodes.Ldarg_3, OpCodes.Ldloc_0, OpCodes.Ldloc_1,  # 0x04
+        OpCodes.Ldloc_2, OpCodes.Ldloc_3, OpCodes.Stloc_0, OpCodes.Stloc_1,  # 0x08
+        OpCodes.Stloc_2, OpCodes.Stloc_3, OpCodes.Ldarg_S, OpCodes.Ldarga_S,  # 0x0C
+        OpCodes.Starg_S, OpCodes.Ldloc_S, OpCodes.Ldloca_S, OpCodes.Stloc_S,  # 0x10
+        OpCodes.Ldnull, OpCodes.Ldc_I4_M1, OpCodes.Ldc_I4_0, OpCodes.Ldc_I4_1,  # 0x14
+        OpCodes.Ldc_I4_2, OpCodes.Ldc_I4_3, OpCodes.Ldc_I4_4, OpCodes.Ldc_I4_5,  # 0x18
+        OpCodes.Ldc_I4_6, OpCodes.Ldc_I4_7, OpCodes.Ldc_I4_8, OpCodes.Ldc_I4_S,  # 0x1C
+        OpCodes.Ldc_I4, OpCodes.Ldc_I8, OpCodes.Ldc_R4, OpCodes.Ldc_R8,  # 0x20
+        OpCodes.UNKNOWN1, OpCodes.Dup, OpCodes.Pop, OpCodes.Jmp,  # 0x24
+        OpCodes.Call, OpCodes.Calli, OpCodes.Ret, OpCodes.Br_S,  # 0x28
+        OpCodes.Brfalse_S, OpCodes.Brtrue_S, OpCodes.Beq_S, OpCodes.Bge_S,  # 0x2C
+        OpCodes.Bgt_S, OpCodes.Ble_S, OpCodes.Blt_S, OpCodes.Bne_Un_S,  # 0x30
+        OpCodes.Bge_Un_S, OpCodes.Bgt_Un_S, OpCodes.Ble_Un_S, OpCodes.Blt_Un_S,  # 0x34
+        OpCodes.Br, OpCodes.Brfalse, OpCodes.Brtrue, OpCodes.Beq,  # 0x38
+        OpCodes.Bge, OpCodes.Bgt, OpCodes.Ble, OpCodes.Blt,  # 0x3C
+        OpCodes.Bne_Un, OpCodes.Bge_Un, OpCodes.Bgt_Un, OpCodes.Ble_Un,  # 0x40
+        OpCodes.Blt_Un, OpCodes.Switch, OpCodes.Ldind_I1, OpCodes.Ldind_U1,  # 0x44
+        OpCodes.Ldind_I2, OpCodes.Ldind_U2, OpCodes.Ldind_I4, OpCodes.Ldind_U4,  # 0x48
+        OpCodes.Ldind_I8, OpCodes.Ldind_I, OpCodes.Ldind_R4, OpCodes.Ldind_R8,  # 0x4C
+        OpCodes.Ldind_Ref, OpCodes.Stind_Ref, OpCodes.Stind_I1, OpCodes.Stind_I2,  # 0x50
+        OpCodes.Stind_I4, OpCodes.Stind_I8, OpCodes.Stind_R4, OpCodes.Stind_R8,  # 0x54
+        OpCodes.Add, OpCodes.Sub, OpCodes.Mul, OpCodes.Div,  # 0x58
+        OpCodes.Div_Un, OpCodes.Rem, OpCodes.Rem_Un, OpCodes.And,  # 0x5C
+        OpCodes.Or, OpCodes.Xor, OpCodes.Shl, OpCodes.Shr,  # 0x60
+        OpCodes.Shr_Un, OpCodes.Neg, OpCodes.Not, OpCodes.Conv_I1,  # 0x64
+        OpCodes.Conv_I2, OpCodes.Conv_I4, OpCodes.Conv_I8, OpCodes.Conv_R4,  # 0x68
+        OpCodes.Conv_R8, OpCodes.Conv_U4, OpCodes.Conv_U8, OpCodes.Callvirt,  # 0x6C
+        OpCodes.Cpobj, OpCodes.Ldobj, OpCodes.Ldstr, OpCodes.Newobj,  # 0x70
+        OpCodes.Castclass, OpCodes.Isinst, OpCodes.Conv_R_Un, OpCodes.UNKNOWN1,  # 0x74
+        OpCodes.UNKNOWN1, OpCodes.Unbox, OpCodes.Throw, OpCodes.Ldfld,  # 0x78
+        OpCodes.Ldflda, OpCodes.Stfld, OpCodes.Ldsfld, OpCodes.Ldsflda,  # 0x7C
+        OpCodes.Stsfld, OpCodes.Stobj, OpCodes.Conv_Ovf_I1_Un, OpCodes.Conv_Ovf_I2_Un,  # 0x80
+        OpCodes.Conv_Ovf_I4_Un, OpCodes.Conv_Ovf_I8_Un, OpCodes.Conv_Ovf_U1_Un, OpCodes.Conv_Ovf_U2_Un,  # 0x84
+        OpCodes.Conv_Ovf_U4_Un, OpCodes.Conv_Ovf_U8_Un, OpCodes.Conv_Ovf_I_Un, OpCodes.Conv_Ovf_U_Un,  # 0x88
+        OpCodes.Box, OpCodes.Newarr, OpCodes.Ldlen, OpCodes.Ldelema,  # 0x8C
+        OpCodes.Ldelem_I1, OpCodes.Ldelem_U1, OpCodes.Ldelem_I2, OpCodes.Ldelem_U2,  # 0x90
+        OpCodes.Ldelem_I4, OpCodes.Ldelem_U4, OpCodes.Ldelem_I8, OpCodes.Ldelem_I,  # 0x94
+        OpCodes.Ldelem_R4, OpCodes.Ldelem_R8, OpCodes.Ldelem_Ref, OpCodes.Stelem_I,  # 0x98
+        OpCodes.Stelem_I1, OpCodes.Stelem_I2, OpCodes.Stelem_I4, OpCodes.Stelem_I8,  # 0x9C
+        OpCodes.Stelem_R4, OpCodes.Stelem_R8, OpCodes.Stelem_Ref, OpCodes.Ldelem,  # 0xA0
+        OpCodes.Stelem, OpCodes.Unbox_Any,  # 0xA4
+    ]
+    + [OpCodes.UNKNOWN1] * 0xD  # 0xA6 - 0xB2
+    + [
+        OpCodes.Conv_Ovf_I1, OpCodes.Conv_Ovf_U1, OpCodes.Conv_Ovf_I2, OpCodes.Conv_Ovf_U2,  # 0xB3
+        OpCodes.Conv_Ovf_I4, OpCodes.Conv_Ovf_U4, OpCodes.Conv_Ovf_I8, OpCodes.Conv_Ovf_U8,  # 0xB7
+    ]
+    + [OpCodes.UNKNOWN1] * 0x7  # 0xBB - 0xC1
+    + [
+        OpCodes.Refanyval, OpCodes.Ckfinite, OpCodes.UNKNOWN1, OpCodes.UNKNOWN1,  # 0xC2
+        OpCodes.Mkrefany,  # 0xC6
+    ]
+    + [OpCodes.UNKNOWN1] * 0x9  # 0xC7 - 0xCF
+    + [
+        OpCodes.Ldtoken, OpCodes.Conv_U2, OpCodes.Conv_U1, OpCodes.Conv_I,  # 0xD0
+        OpCodes.Conv_Ovf_I, OpCodes.Conv_Ovf_U, OpCodes.Add_Ovf, OpCodes.Add_Ovf_Un,  # 0xD4
+        OpCodes.Mul_Ovf, OpCodes.Mul_Ovf_Un, OpCodes.Sub_Ovf, OpCodes.Sub_Ovf_Un,  # 0xD8
+        OpCodes.Endfinally, OpCodes.Leave, OpCodes.Leave_S, OpCodes.Stind_I,  # 0xDC
+        OpCodes.Conv_U,  # 0xE0
+    ]
+    + [OpCodes.UNKNOWN1] * 0x17  # 0xE1 - 0xF7
+    + [
+        OpCodes.Prefix7, OpCodes.Prefix6, OpCodes.Prefix5, OpCodes.Prefix4,  # 0xF8
+        OpCodes.Prefix3, OpCodes.Prefix2, OpCodes.Prefix1, OpCodes.Prefixref,  # 0xFC
+    ]
+)
 
-        for _, opcode in inspect.getmembers(OpCodes, lambda o: isinstance(o, OpCode)):
-            if opcode.value >> 8 == 0:
-                self.one_byte_op_codes[opcode.value] = opcode
-            elif opcode.value >> 8 == 0xFE:
-                self.two_byte_op_codes[opcode.value & 0xFF] = opcode
+TWO_BYTE_OP_CODES: List[OpCode] = (
+    [
+        OpCodes.Arglist, OpCodes.Ceq, OpCodes.Cgt, OpCodes.Cgt_Un,  # 0xFE00
+        OpCodes.Clt, OpCodes.Clt_Un, OpCodes.Ldftn, OpCodes.Ldvirtftn,  # 0xFE04
+        OpCodes.UNKNOWN2, OpCodes.Ldarg, OpCodes.Ldarga, OpCodes.Starg,  # 0xFE08
+        OpCodes.Ldloc, OpCodes.Ldloca, OpCodes.Stloc, OpCodes.Localloc,  # 0xFE0C
+        OpCodes.UNKNOWN2, OpCodes.Endfilter, OpCodes.Unaligned, OpCodes.Volatile,  # 0xFE10
+        OpCodes.Tailcall, OpCodes.Initobj, OpCodes.Constrained, OpCodes.Cpblk,  # 0xFE14
+        OpCodes.Initblk, OpCodes.No, OpCodes.Rethrow, OpCodes.UNKNOWN2,  # 0xFE18
+        OpCodes.Sizeof, OpCodes.Refanytype, OpCodes.Readonly,  # 0xFE1C
+    ]
+    + [OpCodes.UNKNOWN2] * 0xE1  # 0xFE1F - 0xFEFF
+)
+# fmt: on
@@ -12,6 +12,8 @@ from __future__ import annotations
 class Argument:
     """store managed method argument"""
 
+    __slots__ = ("index",)
+
     def __init__(self, index: int):
         self.index: int = index
 
@@ -12,6 +12,8 @@ from __future__ import annotations
 class Local:
     """store managed method local"""
 
+    __slots__ = ("index",)
+
     def __init__(self, index: int):
         self.index: int = index
 
@@ -12,6 +12,8 @@ from __future__ import annotations
 class Token(object):
     """store managed token"""
 
+    __slots__ = ("value",)
+
     RID_MASK: int = 0x00FFFFFF
     RID_MAX: int = RID_MASK
     TABLE_SHIFT: int = 24
@@ -48,6 +50,8 @@ class Token(object):
 class InvalidToken(Token):
     """store invalid managed token"""
 
+    __slots__ = ()
+
     def __init__(self, value: int):
         super(InvalidToken, self).__init__(value)
 
@@ -58,6 +62,8 @@ class InvalidToken(Token):
 class StringToken(Token):
     """store string managed token"""
 
+    __slots__ = ()
+
     def __init__(self, value: int):
         super(StringToken, self).__init__(value)
 
@@ -0,0 +1,71 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""lightweight entry point for decoding managed method bodies
+
+importing this module does not import the opcode tables, enums, or readers; each name is imported from the module
+that defines it on first use, e.g.
+
+    from dncil.decode import read_method_body_from_bytes
+"""
+
+from __future__ import annotations
+
+import importlib
+
+# typing is not imported at runtime so that importing this module stays cheap; mypy treats this as True
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict
+
+    from dncil.cil.body import CilMethodBody
+    from dncil.cil.error import MethodBodyFormatError
+    from dncil.cil.body.reader import (
+        CilMethodBodyReaderBase,
+        CilMethodBodyReaderBytes,
+        CilMethodBodyReaderBuffer,
+        iter_instructions,
+        iter_method_bodies,
+        read_method_bodies,
+        read_method_body_from_bytes,
+    )
+    from dncil.cil.instruction import Instruction
+    from dncil.cil.body.columns import InstructionColumns
+
+# module defining each name exported by this module
+LAZY_ATTRIBUTES: Dict[str, str] = {
+    "CilMethodBody": "dncil.cil.body",
+    "CilMethodBodyReaderBase": "dncil.cil.body.reader",
+    "CilMethodBodyReaderBuffer": "dncil.cil.body.reader",
+    "CilMethodBodyReaderBytes": "dncil.cil.body.reader",
+    "Instruction": "dncil.cil.instruction",
+    "InstructionColumns": "dncil.cil.body.columns",
+    "MethodBodyFormatError": "dncil.cil.error",
+    "iter_instructions": "dncil.cil.body.reader",
+    "iter_method_bodies": "dncil.cil.body.reader",
+    "read_method_bodies": "dncil.cil.body.reader",
+    "read_method_body_from_bytes": "dncil.cil.body.reader",
+}
+
+__all__ = list(LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    """import exported name on first use"""
+    module_name = LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    # cache the name so later lookups do not come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_ATTRIBUTES))
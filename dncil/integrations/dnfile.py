@@ -0,0 +1,128 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING, List, Tuple, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from dnfile import dnPE
+    from dnfile.mdtable import MethodDefRow
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.reader import CilMethodBodyReaderBuffer
+from dncil.cil.body.parallel import map_parallel
+
+# dnfile dnPE shared by all tasks of a worker process; see init_worker
+worker_pe: Optional[dnPE] = None
+
+
+class DnfileMethodBodyReader(CilMethodBodyReaderBuffer):
+    """buffer reader for a managed method body stored in a dnfile dnPE
+
+    the section holding the method body is resolved once and the method body is decoded directly from the file data
+    held by dnfile, bounded to the end of the section; offsets are file offsets. method bodies copy their bytes, so
+    they do not prevent dnfile from closing its mmap
+    """
+
+    def __init__(self, pe: dnPE, rva: int):
+        section = pe.get_section_by_rva(rva)
+        if section is None:
+            raise MethodBodyFormatError("method body RVA 0x%X is not in a section" % rva)
+
+        offset: int = section.get_offset_from_rva(rva)
+        section_end: int = section.PointerToRawData + section.SizeOfRawData
+        if not 0 <= offset < section_end:
+            raise MethodBodyFormatError("method body RVA 0x%X is not in section data" % rva)
+
+        super().__init__(memoryview(pe.__data__)[:section_end], offset)
+
+
+def has_method_body(row: MethodDefRow) -> bool:
+    """check if MethodDef row has a managed method body"""
+    return bool(row.Rva) and bool(row.ImplFlags.miIL) and not any((row.Flags.mdAbstract, row.Flags.mdPinvokeImpl))
+
+
+def read_method_body(pe: dnPE, rva: int, columnar: bool = False, lazy: bool = False) -> CilMethodBody:
+    """read managed method body at RVA from dnfile dnPE
+
+    a lazy method body holds a view of the file data until its instructions are decoded
+    """
+    return CilMethodBody(DnfileMethodBodyReader(pe, rva), columnar=columnar, lazy=lazy)
+
+
+def iter_method_bodies(
+    pe: dnPE,
+    rids: Optional[Iterable[int]] = None,
+    columnar: bool = False,
+    lazy: bool = False,
+    skip_errors: bool = False,
+) -> Iterator[Tuple[int, CilMethodBody]]:
+    """get (MethodDef row index, method body) for each managed method body in dnfile dnPE
+
+    row indexes start at 1, matching MethodDef token row ids; rids selects rows, by default all rows are read.
+    with skip_errors set, method bodies that fail to parse are skipped instead of raising MethodBodyFormatError; as lazy
+    method bodies decode their instructions after they are yielded, lazy and skip_errors cannot be combined
+    """
+    if lazy and skip_errors:
+        raise ValueError("skip_errors cannot skip instruction errors of lazy method bodies")
+
+    if pe.net is None or pe.net.mdtables is None or pe.net.mdtables.MethodDef is None:
+        return
+
+    rows: List[MethodDefRow] = pe.net.mdtables.MethodDef.rows
+    for rid in range(1, len(rows) + 1) if rids is None else rids:
+        row: MethodDefRow = rows[rid - 1]
+        if not has_method_body(row):
+            continue
+
+        try:
+            body: CilMethodBody = read_method_body(pe, row.Rva, columnar=columnar, lazy=lazy)
+        except MethodBodyFormatError:
+            if skip_errors:
+                continue
+            raise
+        yield rid, body
+
+
+def init_worker(path: str):
+    """parse .NET file once per worker process"""
+    import dnfile
+
+    global worker_pe
+    worker_pe = dnfile.dnPE(path)
+
+
+def read_chunk(rids: List[int], skip_errors: bool = False) -> List[Tuple[int, CilMethodBody]]:
+    """read method bodies of MethodDef rows in the .NET file parsed by the worker process"""
+    assert worker_pe is not None
+    return list(iter_method_bodies(worker_pe, rids, columnar=True, skip_errors=skip_errors))
+
+
+def iter_method_bodies_parallel(
+    path: str,
+    rids: Iterable[int],
+    max_workers: Optional[int] = None,
+    chunk_size: int = 512,
+    skip_errors: bool = False,
+) -> Iterator[Tuple[int, CilMethodBody]]:
+    """get (MethodDef row index, method body) for each managed method body of MethodDef rows rids in the .NET file
+    at path, decoded across a pool of worker processes
+
+    each worker parses the file once; see dncil.cil.body.parallel.iter_method_bodies_parallel
+    """
+    yield from map_parallel(
+        functools.partial(read_chunk, skip_errors=skip_errors),
+        rids,
+        init_worker,
+        (path,),
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+    )
@@ -0,0 +1,250 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import pickle
+import struct
+import timeit
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Dict, List, Tuple, Union, Callable
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.enums import OperandType
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.cfg import ControlFlowGraph
+from dncil.cil.body.reader import (
+    UINT8,
+    UINT32,
+    OPERAND_READER_NAMES,
+    CilMethodBodyReaderBase,
+    CilMethodBodyReaderBytes,
+    CilMethodBodyReaderBuffer,
+    iter_method_bodies,
+)
+from dncil.cil.instruction import Instruction
+from dncil.cil.body.parallel import iter_method_bodies_parallel
+from dncil.cil.body.serialize import dumps, loads
+from dncil.cil.body.dominators import DominatorTree, find_natural_loops
+
+# instruction pattern used to build synthetic method bodies; covers the common operand types
+INSTRUCTION_PATTERN: List[bytes] = [
+    b"\x02",  # ldarg.0
+    b"\x20" + struct.pack("<i", 0x1337),  # ldc.i4
+    b"\x28" + struct.pack("<I", 0x0A00000C),  # call
+    b"\x72" + struct.pack("<I", 0x70000001),  # ldstr
+    b"\x13\x05",  # stloc.s
+    b"\x2b\x00",  # br.s
+    b"\x23" + struct.pack("<d", 1.5),  # ldc.r8
+    b"\xfe\x01",  # ceq
+    b"\x45" + struct.pack("<Iii", 2, 0, 0),  # switch
+    b"\x00",  # nop
+]
+
+
+def build_method_body(num_insns: int) -> bytes:
+    """build fat method body containing num_insns instructions"""
+    code: bytes = b"".join(INSTRUCTION_PATTERN[i % len(INSTRUCTION_PATTERN)] for i in range(num_insns - 1)) + b"\x2a"
+
+    # fat header: size 3 (dwords), fat format, init locals; max stack 8, no local variables
+    return struct.pack("<HHII", 0x3013, 8, len(code), 0) + code
+
+
+def bench(name: str, func: Callable, number: int, units: int):
+    """print best per-unit time of func"""
+    best: float = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"{name : <50}{best / (number * units) * 1e9 : >10.1f} ns")
+
+
+class FormatUnpackReader(CilMethodBodyReaderBytes):
+    """reader that decodes each integer from its format string, for comparison"""
+
+    def _unpack(self, data_format: str) -> Tuple[Union[int, float], bytes]:
+        unpack_size: int = struct.calcsize(data_format)
+        curr_off: int = self.tell()
+        unpack_bytes: bytes = self.read(unpack_size)
+        if len(unpack_bytes) != unpack_size:
+            raise MethodBodyFormatError("not enough data while parsing method body @ offset 0x%X" % curr_off)
+        return struct.unpack(data_format, unpack_bytes)[0], unpack_bytes
+
+
+def bench_unpack(args):
+    """compare per-call format decoding against precompiled decoders"""
+    data: bytes = build_method_body(args.num_insns)
+    count: int = len(data) // 4
+
+    def unpack(reader, data_format):
+        reader.seek(0)
+        for _ in range(count):
+            reader._unpack(data_format)
+
+    def unpack_struct(reader, decoder):
+        reader.seek(0)
+        for _ in range(count):
+            reader._unpack_struct(decoder)
+
+    baseline: FormatUnpackReader = FormatUnpackReader(data)
+    for data_format, decoder in (("<B", UINT8), ("<I", UINT32)):
+        bench(f"FormatUnpackReader _unpack('{data_format}')", lambda: unpack(baseline, data_format), 3, count)
+        for reader in (CilMethodBodyReaderBytes(data), CilMethodBodyReaderBuffer(data)):
+            name: str = f"{type(reader).__name__} _unpack_struct({data_format!r})"
+            bench(name, lambda: unpack_struct(reader, decoder), 3, count)
+
+
+def bench_decode(args):
+    """compare per-instruction decode time of readers"""
+    data: bytes = build_method_body(args.num_insns)
+
+    bench("CilMethodBodyReaderBytes", lambda: CilMethodBody(CilMethodBodyReaderBytes(data)), 3, args.num_insns)
+    bench("CilMethodBodyReaderBuffer", lambda: CilMethodBody(CilMethodBodyReaderBuffer(data)), 3, args.num_insns)
+
+
+def bench_memory(args):
+    """report memory retained per decoded instruction across many method bodies"""
+    num_methods: int = max(args.num_insns // 100, 1)
+    data: bytes = build_method_body(100) * num_methods
+
+    for columnar in (False, True):
+        tracemalloc.start()
+        before: int = tracemalloc.get_traced_memory()[0]
+
+        reader: CilMethodBodyReaderBuffer = CilMethodBodyReaderBuffer(data)
+        bodies: List[CilMethodBody] = [CilMethodBody(reader, columnar=columnar) for _ in range(num_methods)]
+
+        retained: int = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        num_insns: int = sum(len(body.instructions) for body in bodies)
+        name: str = "retained bytes per instruction" + (" (columnar)" if columnar else "")
+        print(f"{name : <50}{retained / num_insns : >10.1f} B")
+
+
+class GenericLoopReader(CilMethodBodyReaderBuffer):
+    """reader that decodes instructions one at a time through read_operand, without the table-driven loop"""
+
+    def read_instructions(self, off: int, code_size: int) -> List[Instruction]:
+        return CilMethodBodyReaderBase.read_instructions(self, off, code_size)
+
+
+class DictDispatchReader(GenericLoopReader):
+    """reader that builds its operand reader mapping per instruction, for comparison"""
+
+    def read_operand(self, insn: Instruction) -> Tuple[Any, bytes]:
+        readers: Dict[OperandType, Callable] = {
+            operand_type: getattr(self, name) for operand_type, name in OPERAND_READER_NAMES.items()
+        }
+        return readers[insn.opcode.operand_type](insn)
+
+
+def bench_dispatch(args):
+    """compare per-instruction operand dispatch against a per-instruction mapping"""
+    data: bytes = build_method_body(args.num_insns)
+
+    # both readers use the generic decode loop, so only operand dispatch differs
+    for reader_type in (DictDispatchReader, GenericLoopReader):
+        bench(reader_type.__name__, lambda: CilMethodBody(reader_type(data)), 3, args.num_insns)
+
+
+def bench_serialize(args):
+    """compare size and load time of pickled method bodies against the binary encoding"""
+    data: bytes = build_method_body(args.num_insns)
+
+    for columnar in (False, True):
+        body: CilMethodBody = CilMethodBody(CilMethodBodyReaderBuffer(data), columnar=columnar)
+        pickled: bytes = pickle.dumps(body)
+        name: str = "pickle" + (" (columnar)" if columnar else "")
+        print(f"{name + ' bytes per instruction' : <50}{len(pickled) / args.num_insns : >10.1f} B")
+        bench(f"{name} loads", lambda: pickle.loads(pickled), 3, args.num_insns)
+
+    encoded: bytes = dumps(body)
+    print(f"{'dumps bytes per instruction' : <50}{len(encoded) / args.num_insns : >10.1f} B")
+    bench("loads", lambda: loads(encoded), 3, args.num_insns)
+    bench("decode", lambda: CilMethodBody(CilMethodBodyReaderBuffer(data), columnar=True), 3, args.num_insns)
+
+
+def bench_parallel(args):
+    """compare decoding many method bodies in one process against a pool of worker processes"""
+    num_methods: int = max(args.num_insns // 100, 1)
+    method_body: bytes = build_method_body(100)
+    offsets: List[int] = [i * len(method_body) for i in range(num_methods)]
+
+    with tempfile.NamedTemporaryFile(suffix=".bin") as f:
+        f.write(method_body * num_methods)
+        f.flush()
+
+        with open(f.name, "rb") as g:
+            data: bytes = g.read()
+
+        bench("iter_method_bodies", lambda: list(iter_method_bodies(data, offsets)), 1, args.num_insns)
+        for jobs in (2, 4, 8):
+            bench(
+                f"iter_method_bodies_parallel (jobs={jobs})",
+                lambda: list(iter_method_bodies_parallel(f.name, offsets, max_workers=jobs)),
+                1,
+                args.num_insns,
+            )
+
+
+def bench_cfg(args):
+    """report per-instruction control flow graph build time at increasing method sizes"""
+    for num_insns in (args.num_insns // 10, args.num_insns):
+        for columnar in (False, True):
+            body: CilMethodBody = CilMethodBody(
+                CilMethodBodyReaderBuffer(build_method_body(num_insns)), columnar=columnar
+            )
+            name: str = f"ControlFlowGraph ({num_insns} instructions{', columnar' if columnar else ''})"
+            bench(name, lambda: ControlFlowGraph(body), 1, num_insns)
+
+
+def build_flattened_method_body(num_cases: int) -> bytes:
+    """build fat method body dispatching num_cases blocks through a switch, as control flow flattening does"""
+    # IL_0000: ldloc.0; switch to each case; ret, then each case: nop; br back to IL_0000
+    switch_size: int = 1 + 4 + 4 * num_cases
+    dispatcher_size: int = 1 + switch_size
+    cases_offset: int = dispatcher_size + 1
+    case_size: int = 1 + 5
+
+    code: bytes = b"\x06\x45" + struct.pack("<I", num_cases)
+    code += b"".join(struct.pack("<i", cases_offset + i * case_size - dispatcher_size) for i in range(num_cases))
+    code += b"\x2a"
+    for i in range(num_cases):
+        code += b"\x00\x38" + struct.pack("<i", -(cases_offset + (i + 1) * case_size))
+
+    return struct.pack("<HHII", 0x3013, 8, len(code), 0) + code
+
+
+def bench_dominators(args):
+    """report dominator and loop computation time per block of flattened method bodies"""
+    for num_cases in (args.num_insns // 100, args.num_insns // 10):
+        cfg: ControlFlowGraph = ControlFlowGraph(
+            CilMethodBody(CilMethodBodyReaderBuffer(build_flattened_method_body(num_cases)), columnar=True)
+        )
+        bench(f"DominatorTree ({len(cfg)} blocks)", lambda: DominatorTree(cfg), 1, len(cfg))
+        bench(f"DominatorTree, post ({len(cfg)} blocks)", lambda: DominatorTree(cfg, post=True), 1, len(cfg))
+        bench(f"find_natural_loops ({len(cfg)} blocks)", lambda: find_natural_loops(cfg), 1, len(cfg))
+
+
+def main(args):
+    args.func(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Benchmark dncil method body decoding")
+    parser.add_argument("-n", "--num-insns", type=int, default=100000, help="Number of instructions in method body")
+    subparsers = parser.add_subparsers(required=True)
+
+    subparsers.add_parser("unpack", help="Benchmark integer decoding").set_defaults(func=bench_unpack)
+    subparsers.add_parser("decode", help="Benchmark per-instruction decoding").set_defaults(func=bench_decode)
+    subparsers.add_parser("dispatch", help="Benchmark operand dispatch").set_defaults(func=bench_dispatch)
+    subparsers.add_parser("serialize", help="Benchmark serialization").set_defaults(func=bench_serialize)
+    subparsers.add_parser("parallel", help="Benchmark parallel decoding").set_defaults(func=bench_parallel)
+    subparsers.add_parser("cfg", help="Benchmark control flow graph building").set_defaults(func=bench_cfg)
+    subparsers.add_parser("dominators", help="Benchmark dominators and loops").set_defaults(func=bench_dominators)
+    subparsers.add_parser("memory", help="Benchmark memory per decoded instruction").set_defaults(func=bench_memory)
+
+    main(parser.parse_args())
@@ -0,0 +1,165 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Set, Dict, List, Tuple, Union, Iterator
+
+if TYPE_CHECKING:
+    from dnfile import dnPE
+    from multiprocessing.connection import Connection
+
+import os
+import json
+import time
+import argparse
+import multiprocessing
+import multiprocessing.connection
+
+import dnfile
+
+from dncil.clr.token import Token
+from dncil.integrations.dnfile import iter_method_bodies
+
+
+def format_operand(operand: Any) -> Any:
+    """get JSON-serializable operand"""
+    if isinstance(operand, Token):
+        return operand.value
+    elif isinstance(operand, (int, float, list)) or operand is None:
+        return operand
+    return str(operand)
+
+
+def disassemble_file(path: str) -> Dict[str, Any]:
+    """get result record for .NET file"""
+    pe: dnPE = dnfile.dnPE(path)
+    try:
+        if pe.net is None:
+            return {"path": path, "status": "error", "error": "not a .NET file"}
+
+        methods: List[Dict[str, Any]] = []
+        for rid, body in iter_method_bodies(pe, columnar=True, skip_errors=True):
+            methods.append(
+                {
+                    "rid": rid,
+                    "name": str(pe.net.mdtables.MethodDef.rows[rid - 1].Name),
+                    "offset": body.offset,
+                    "code_size": body.code_size,
+                    "instructions": [
+                        [insn.offset, insn.mnemonic, format_operand(insn.operand)] for insn in body.instructions
+                    ],
+                }
+            )
+        return {"path": path, "status": "ok", "methods": methods}
+    finally:
+        pe.close()
+
+
+def disassemble_file_worker(path: str, conn: Connection):
+    """send serialized result record for .NET file to parent process"""
+    try:
+        line: str = json.dumps(disassemble_file(path))
+    except Exception as e:
+        line = json.dumps({"path": path, "status": "error", "error": str(e)})
+    conn.send(line)
+    conn.close()
+
+
+def normalize_path(path: Union[str, os.PathLike]) -> str:
+    """get absolute path with symbolic links resolved, so a file has the same path however root is given"""
+    return os.path.normcase(os.path.realpath(path))
+
+
+def iter_paths(root: str) -> Iterator[str]:
+    """get normalized paths of all files below root, in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(normalize_path(root)):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            yield normalize_path(os.path.join(dirpath, filename))
+
+
+def read_checkpoint(path: str) -> Set[str]:
+    """get normalized paths of files completed by previous runs"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {normalize_path(line.rstrip("\n")) for line in f if line.strip()}
+
+
+def main(args):
+    """ """
+    checkpoint_path: str = args.checkpoint or args.output + ".checkpoint"
+    completed: Set[str] = read_checkpoint(checkpoint_path)
+    # the output and checkpoint files may be below root; they are not inputs
+    completed.update((normalize_path(args.output), normalize_path(checkpoint_path)))
+    paths: Iterator[str] = (path for path in iter_paths(args.root) if path not in completed)
+
+    # running workers keyed by the parent end of their result pipe
+    running: Dict[Connection, Tuple[multiprocessing.Process, str, float]] = {}
+
+    with open(args.output, "a", encoding="utf-8") as f_out, open(checkpoint_path, "a", encoding="utf-8") as f_ckpt:
+
+        def complete(path: str, line: str):
+            # results are written before the checkpoint, so an interrupted run repeats at most the files in flight
+            f_out.write(line + "\n")
+            f_out.flush()
+            f_ckpt.write(path + "\n")
+            f_ckpt.flush()
+
+        exhausted: bool = False
+        while running or not exhausted:
+            while not exhausted and len(running) < args.jobs:
+                try:
+                    path: str = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                conn_recv, conn_send = multiprocessing.Pipe(duplex=False)
+                proc: multiprocessing.Process = multiprocessing.Process(
+                    target=disassemble_file_worker, args=(path, conn_send), daemon=True
+                )
+                proc.start()
+                conn_send.close()
+                running[conn_recv] = (proc, path, time.monotonic() + args.timeout)
+
+            if not running:
+                break
+
+            timeout: float = max(0.0, min(deadline for _, _, deadline in running.values()) - time.monotonic())
+            for conn in multiprocessing.connection.wait(list(running), timeout=timeout):
+                proc, path, _ = running.pop(conn)
+                try:
+                    line: str = conn.recv()
+                except EOFError:
+                    line = json.dumps({"path": path, "status": "error", "error": "worker exited unexpectedly"})
+                conn.close()
+                proc.join()
+                complete(path, line)
+
+            now: float = time.monotonic()
+            for conn, (proc, path, deadline) in list(running.items()):
+                if deadline <= now:
+                    proc.terminate()
+                    proc.join()
+                    conn.close()
+                    del running[conn]
+                    complete(path, json.dumps({"path": path, "status": "timeout"}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Disassemble the managed methods of all .NET binaries in a directory")
+    parser.add_argument("root", type=str, help="Full path to directory containing .NET binaries")
+    parser.add_argument("output", type=str, help="Full path to JSON lines output file, appended to")
+    parser.add_argument(
+        "-c", "--checkpoint", type=str, help="Full path to checkpoint file, default: <output>.checkpoint"
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("-t", "--timeout", type=float, default=300.0, help="Seconds allowed per file")
+
+    main(parser.parse_args())
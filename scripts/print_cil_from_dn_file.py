@@ -7,11 +7,10 @@
 # See the License for the specific language governing permissions and limitations under the License.
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Union, Optional
+from typing import TYPE_CHECKING, Any, Dict, Union, Optional
 
 if TYPE_CHECKING:
     from dnfile import dnPE
-    from dnfile.mdtable import MethodDefRow
 
 import argparse
 
@@ -21,34 +20,12 @@ from dnfile.enums import MetadataTables
 from dncil.cil.body import CilMethodBody
 from dncil.cil.error import MethodBodyFormatError
 from dncil.clr.token import Token, StringToken, InvalidToken
-from dncil.cil.body.reader import CilMethodBodyReaderBase
+from dncil.integrations.dnfile import has_method_body, read_method_body, iter_method_bodies_parallel
 
 # key token indexes to dotnet meta tables
 DOTNET_META_TABLES_BY_INDEX = {table.value: table.name for table in MetadataTables}
 
 
-class DnfileMethodBodyReader(CilMethodBodyReaderBase):
-    def __init__(self, pe: dnPE, row: MethodDefRow):
-        """ """
-        self.pe: dnPE = pe
-        self.offset: int = self.pe.get_offset_from_rva(row.Rva)
-
-    def read(self, n: int) -> bytes:
-        """ """
-        data: bytes = self.pe.get_data(self.pe.get_rva_from_offset(self.offset), n)
-        self.offset += n
-        return data
-
-    def tell(self) -> int:
-        """ """
-        return self.offset
-
-    def seek(self, offset: int) -> int:
-        """ """
-        self.offset = offset
-        return self.offset
-
-
 def read_dotnet_user_string(pe: dnfile.dnPE, token: StringToken) -> Union[str, InvalidToken]:
     """read user string from #US stream"""
     try:
@@ -84,11 +61,6 @@ def resolve_token(pe: dnPE, token: Token) -> Any:
         return InvalidToken(token.value)
 
 
-def read_method_body(pe: dnPE, row: MethodDefRow) -> CilMethodBody:
-    """ """
-    return CilMethodBody(DnfileMethodBodyReader(pe, row))
-
-
 def format_operand(pe: dnPE, operand: Any) -> str:
     """ """
     if isinstance(operand, Token):
@@ -117,13 +89,19 @@ def main(args):
     """ """
     pe: dnPE = dnfile.dnPE(args.path)
 
-    for row in pe.net.mdtables.MethodDef:
-        if not row.ImplFlags.miIL or any((row.Flags.mdAbstract, row.Flags.mdPinvokeImpl)):
+    bodies: Dict[int, CilMethodBody] = {}
+    if args.jobs > 1:
+        # decode method bodies across worker processes; method bodies that fail to parse are read again below
+        rids: range = range(1, len(pe.net.mdtables.MethodDef) + 1)
+        bodies = dict(iter_method_bodies_parallel(args.path, rids, max_workers=args.jobs, skip_errors=True))
+
+    for rid, row in enumerate(pe.net.mdtables.MethodDef, start=1):
+        if not has_method_body(row):
             # skip methods that do not have a method body
             continue
 
         try:
-            body: CilMethodBody = read_method_body(pe, row)
+            body: CilMethodBody = bodies[rid] if rid in bodies else read_method_body(pe, row.Rva)
         except MethodBodyFormatError as e:
             print(e)
             continue
@@ -145,5 +123,6 @@ def main(args):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog="Print IL from the managed methods of a .NET binary")
     parser.add_argument("path", type=str, help="Full path to .NET binary")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of worker processes used to decode methods")
 
     main(parser.parse_args())
@@ -6,8 +6,15 @@
 #  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and limitations under the License.
 
+import sys
+import struct
+import binascii
+import subprocess
+import importlib.util
 from pathlib import Path
 
+from dncil.cil.enums import OperandType
+
 CD = Path(__file__).parent
 DATA = CD / "data"
 
@@ -17,3 +24,270 @@ def get_data_path_by_name(name):
         return DATA / "hello-world" / "hello-world.exe"
 
     raise ValueError("unknown test file")
+
+
+def load_script(name):
+    """import script from the scripts directory as a module"""
+    spec = importlib.util.spec_from_file_location(name, CD.parent / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_pe(section_data, overlay=b"", clr_header_rva=0):
+    """build PE32 file with a single section at RVA 0x1000, file offset 0x200"""
+    size_of_raw_data = (len(section_data) + 0x1FF) & ~0x1FF
+
+    headers = b"MZ" + b"\x00" * 0x3A + struct.pack("<I", 0x40)
+    headers += b"PE\x00\x00" + struct.pack("<HHIIIHH", 0x14C, 1, 0, 0, 0, 0xE0, 0x0102)
+    # optional header: magic, linker version, sizes of code and data, entry point, bases of code and data, image base
+    headers += struct.pack("<HBBIIIIIII", 0x10B, 0, 0, size_of_raw_data, 0, 0, 0x1000, 0x1000, 0x1000, 0x400000)
+    # alignments, versions, sizes of image and headers, checksum, subsystem, dll characteristics
+    headers += struct.pack(
+        "<IIHHHHHHIIIIHH", 0x1000, 0x200, 4, 0, 0, 0, 4, 0, 0, 0x1000 + size_of_raw_data, 0x200, 0, 3, 0
+    )
+    # stack and heap sizes, loader flags, data directories (all empty but the CLR header if there is one)
+    headers += struct.pack("<IIIIII", 0x100000, 0x1000, 0x100000, 0x1000, 0, 16) + b"\x00" * 14 * 8
+    headers += struct.pack("<II", clr_header_rva, 0x48 if clr_header_rva else 0) + b"\x00" * 8
+    headers += struct.pack(
+        "<8sIIIIIIHHI", b".text", len(section_data), 0x1000, size_of_raw_data, 0x200, 0, 0, 0, 0, 0x60000020
+    )
+
+    return headers.ljust(0x200, b"\x00") + section_data.ljust(size_of_raw_data, b"\x00") + overlay
+
+
+def build_metadata(methods):
+    """build metadata holding a MethodDef table of (name, RVA, flags) rows, all void methods without parameters"""
+    strings = b"\x00"
+    method_rows = b""
+    for name, rva, flags in methods:
+        # RVA, implementation flags (IL), flags, name, signature, parameter list
+        method_rows += struct.pack("<IHHHHH", rva, 0, flags, len(strings), 1, 1)
+        strings += name.encode() + b"\x00"
+
+    # tables stream: reserved, version 2.0, heap sizes, reserved, valid and sorted tables, row counts, rows
+    tables = struct.pack("<IBBBBQQ", 0, 2, 0, 0, 1, 1 << 0x06, 0) + struct.pack("<I", len(methods)) + method_rows
+    # blob heap holding a default calling convention signature without parameters returning void
+    blobs = b"\x00" + b"\x03\x00\x00\x01"
+    # user string heap holding "hi", the first string of method_body_fat
+    user_strings = b"\x00" + b"\x05h\x00i\x00\x00"
+    streams = [
+        (b"#~", tables),
+        (b"#Strings", strings),
+        (b"#US", user_strings),
+        (b"#Blob", blobs),
+        (b"#GUID", b"\x00" * 16),
+    ]
+    streams = [(name, data.ljust((len(data) + 3) & ~3, b"\x00")) for name, data in streams]
+
+    version = b"v4.0.30319".ljust(12, b"\x00")
+    header = struct.pack("<IHHII", 0x424A5342, 1, 1, 0, len(version)) + version + struct.pack("<HH", 0, len(streams))
+    header_size = len(header) + sum(8 + ((len(name) + 4) & ~3) for name, _ in streams)
+
+    offset = header_size
+    for name, data in streams:
+        header += struct.pack("<II", offset, len(data)) + name.ljust((len(name) + 4) & ~3, b"\x00")
+        offset += len(data)
+    return header + b"".join(data for _, data in streams)
+
+
+def build_dotnet_pe(methods):
+    """build .NET PE32 file with a MethodDef row per (name, method body or None) of methods
+
+    method bodies follow the CLR header at RVA 0x1000, each aligned to 4 bytes; methods without a method body are
+    abstract and have no RVA
+    """
+    section_data = b"\x00" * 0x48
+    rows = []
+    for name, method_body in methods:
+        if method_body is None:
+            rows.append((name, 0, 0x0400))
+            continue
+        rows.append((name, 0x1000 + len(section_data), 0))
+        section_data = (section_data + method_body).ljust((len(section_data) + len(method_body) + 3) & ~3, b"\x00")
+
+    metadata = build_metadata(rows)
+    # CLR header: size, runtime version 2.5, metadata directory, IL only flag, and empty directories
+    clr_header = struct.pack("<IHHIII", 0x48, 2, 5, 0x1000 + len(section_data), len(metadata), 1)
+    return build_pe(clr_header.ljust(0x48, b"\x00") + section_data[0x48:] + metadata, clr_header_rva=0x1000)
+
+
+def get_import_times(module, statement="pass"):
+    """get (self, cumulative) import time in microseconds by module name, as reported by python -X importtime, of
+    importing module and then running statement"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}\n{statement}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+EXCEPTION_HANDLER_FIELDS = (
+    "exception_type",
+    "try_start",
+    "try_end",
+    "filter_start",
+    "handler_start",
+    "handler_end",
+    "catch_type",
+)
+
+
+def get_relocated_operand(insn, offset):
+    """get instruction operand with branch targets moved by offset"""
+    if insn.opcode.operand_type == OperandType.InlineSwitch:
+        return [target + offset for target in insn.operand]
+    elif insn.opcode.operand_type in (OperandType.InlineBrTarget, OperandType.ShortInlineBrTarget):
+        return insn.operand + offset
+    return insn.operand
+
+
+def assert_method_body_equal(body, expected, offset=0):
+    """assert method body decodes the same as expected, read offset bytes further into its buffer"""
+    assert body.offset == expected.offset + offset
+    assert body.get_bytes() == expected.get_bytes()
+    assert body.flags.value == expected.flags.value
+    assert (body.header_size, body.max_stack, body.code_size, body.size) == (
+        expected.header_size,
+        expected.max_stack,
+        expected.code_size,
+        expected.size,
+    )
+    assert body.local_var_sig_tok == expected.local_var_sig_tok
+    assert body.exception_handlers_size == expected.exception_handlers_size
+
+    assert len(body.instructions) == len(expected.instructions)
+    for insn, expected_insn in zip(body.instructions, expected.instructions):
+        assert insn.offset == expected_insn.offset + offset
+        assert insn.opcode is expected_insn.opcode
+        assert type(insn.operand) is type(expected_insn.operand)
+        assert insn.operand == get_relocated_operand(expected_insn, offset)
+        assert insn.size == expected_insn.size
+        assert insn.get_opcode_bytes() == expected_insn.get_opcode_bytes()
+        assert insn.get_operand_bytes() == expected_insn.get_operand_bytes()
+
+    assert len(body.exception_handlers) == len(expected.exception_handlers)
+    for eh, expected_eh in zip(body.exception_handlers, expected.exception_handlers):
+        for name in EXCEPTION_HANDLER_FIELDS:
+            assert getattr(eh, name) == getattr(expected_eh, name)
+
+
+"""
+.method private hidebysig static
+    void Main (
+        string[] args
+    ) cil managed
+{
+    // Header Size: 12 bytes
+    // Code Size: 37 (0x25) bytes
+    .maxstack 1
+    .entrypoint
+
+    .try
+    {
+        .try
+        {
+            /* 0x0000025C 7201000070   */ IL_0000: ldstr     "Hello World!"
+            /* 0x00000261 280B00000A   */ IL_0005: call      void [System.Console]System.Console::WriteLine(string)
+            /* 0x00000266 DE18         */ IL_000A: leave.s   IL_0024
+        } // end .try
+        catch [System.Runtime]System.Exception
+        {
+            /* 0x00000268 26           */ IL_000C: pop
+            /* 0x00000269 721B000070   */ IL_000D: ldstr     "Exception occurred."
+            /* 0x0000026E 280B00000A   */ IL_0012: call      void [System.Console]System.Console::WriteLine(string)
+            /* 0x00000273 DE0B         */ IL_0017: leave.s   IL_0024
+        } // end handler
+    } // end .try
+    finally
+    {
+        /* 0x00000275 7243000070   */ IL_0019: ldstr     "Finally occurred."
+        /* 0x0000027A 280B00000A   */ IL_001E: call      void [System.Console]System.Console::WriteLine(string)
+        /* 0x0000027F DC           */ IL_0023: endfinally
+    } // end handler
+
+    /* 0x00000280 2A           */ IL_0024: ret
+} // end of method Program::Main
+"""
+method_body_fat = binascii.unhexlify(
+    "1B30010025000000000000007201000070280B00000ADE1826721B000070280B00000ADE0B7243000070280B00000ADC2A000000011C0000000000000C0C000D0D000001020000001919000B00000000"
+)
+
+"""
+.method public hidebysig specialname rtspecialname
+    instance void .ctor () cil managed
+{
+    // Header Size: 1 byte
+    // Code Size: 7 (0x7) bytes
+    .maxstack 8
+
+    /* 0x000002A1 02           */ IL_0000: ldarg.0
+    /* 0x000002A2 280C00000A   */ IL_0001: call      instance void [System.Runtime]System.Object::.ctor()
+    /* 0x000002A7 2A           */ IL_0006: ret
+} // end of method Program::.ctor
+"""
+method_body_tiny = binascii.unhexlify("1E02280C00000A2A")
+
+"""
+synthetic method body covering every operand type supported by the decoder
+
+    IL_0000: ldarg.s   argument(0x0001)
+    IL_0002: ldloc.s   local(0x0002)
+    IL_0004: ldarg     argument(0x0003)
+    IL_0008: ldc.i4.s  -1
+    IL_000A: ldc.i4    0x1337
+    IL_000F: ldc.i8    -2
+    IL_0018: ldc.r4    1.5
+    IL_001D: ldc.r8    2.5
+    IL_0026: ldstr     string token(0x70000001)
+    IL_002B: ldtoken   token(0x02000002)
+    IL_0030: switch    [IL_003E, IL_0030]
+    IL_003D: nop
+    IL_003E: brtrue.s  IL_0000
+    IL_0040: br        IL_0045
+    IL_0045: ret
+"""
+method_body_operands = binascii.unhexlify(
+    "133008004600000000000000"
+    + "0E01"
+    + "1102"
+    + "FE090300"
+    + "1FFF"
+    + "2037130000"
+    + "21FEFFFFFFFFFFFFFF"
+    + "220000C03F"
+    + "230000000000000440"
+    + "7201000070"
+    + "D002000002"
+    + "450200000001000000F3FFFFFF"
+    + "00"
+    + "2DC0"
+    + "3800000000"
+    + "2A"
+)
+
+"""
+malformed method body with a switch branch offset that puts its target beyond the 32-bit range
+
+    IL_0000: switch    [IL_80000008]
+    IL_0009: ret
+"""
+method_body_far_switch = binascii.unhexlify("2A" + "4501000000FFFFFF7F" + "2A")
+
+"""
+malformed method body whose code size of 3 bytes ends inside the operand of its only instruction; readers take the
+rest of the operand from the bytes that follow
+
+    IL_0000: ldc.i4    1
+"""
+method_body_operand_overrun = binascii.unhexlify("133008000300000000000000" + "2001000000")
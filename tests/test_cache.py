@@ -0,0 +1,122 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fixtures import (
+    method_body_fat,
+    method_body_tiny,
+    method_body_operands,
+    assert_method_body_equal,
+    method_body_operand_overrun,
+)
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.body.cache import LRUMethodBodyCache, SqliteMethodBodyCache, get_digest
+from dncil.cil.body.reader import CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer
+from dncil.cil.body.columns import InstructionColumns
+
+
+@pytest.mark.parametrize("method_body", [method_body_tiny, method_body_fat, method_body_operands])
+def test_sqlite_cache(tmp_path, method_body):
+    path = str(tmp_path / "cache.sqlite")
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body))
+
+    with SqliteMethodBodyCache(path) as cache:
+        body = cache.read_method_body(CilMethodBodyReaderBytes(method_body))
+        assert (cache.hits, cache.misses) == (0, 1)
+        assert_method_body_equal(body, expected)
+
+        body = cache.read_method_body_from_bytes(method_body)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert isinstance(body.instructions, InstructionColumns)
+        assert_method_body_equal(body, expected)
+
+    # cached method bodies persist and are relocated to the offset they are read from
+    buf = b"\x00" * 0x10 + method_body
+    expected = CilMethodBody(CilMethodBodyReaderBuffer(buf, 0x10))
+    with SqliteMethodBodyCache(path) as cache:
+        body = cache.read_method_body(CilMethodBodyReaderBuffer(buf, 0x10))
+        assert (cache.hits, cache.misses) == (1, 0)
+        assert_method_body_equal(body, expected)
+
+
+def test_sqlite_cache_bad_data(tmp_path):
+    body = CilMethodBody(CilMethodBodyReaderBytes(method_body_fat))
+
+    with SqliteMethodBodyCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.put_data(get_digest(body), b"bad data")
+
+        assert_method_body_equal(cache.read_method_body_from_bytes(method_body_fat), body)
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        assert_method_body_equal(cache.read_method_body_from_bytes(method_body_fat), body)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_cache():
+    cache = LRUMethodBodyCache(maxsize=2)
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body_fat))
+
+    body = cache.read_method_body_from_bytes(method_body_fat)
+    assert_method_body_equal(body, expected)
+
+    # cached method bodies are not shared with callers
+    body.exception_handlers.clear()
+    body.max_stack = 0
+    body = cache.read_method_body(CilMethodBodyReaderBytes(method_body_fat))
+    assert_method_body_equal(body, expected)
+    assert body.max_stack == expected.max_stack
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # least recently used method body is evicted
+    _ = cache.read_method_body_from_bytes(method_body_tiny)
+    _ = cache.read_method_body_from_bytes(method_body_fat)
+    _ = cache.read_method_body_from_bytes(method_body_operands)
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    _ = cache.read_method_body_from_bytes(method_body_fat)
+    _ = cache.read_method_body_from_bytes(method_body_tiny)
+    assert (cache.hits, cache.misses) == (3, 4)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    cache = LRUMethodBodyCache(maxsize=0)
+    _ = cache.read_method_body_from_bytes(method_body_fat)
+    _ = cache.read_method_body_from_bytes(method_body_fat)
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_lru_cache_threads():
+    cache = LRUMethodBodyCache()
+    method_bodies = [method_body_tiny, method_body_fat, method_body_operands] * 100
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in executor.map(cache.read_method_body_from_bytes, method_bodies):
+            pass
+
+    # every read is counted once, whichever thread decoded the method body first
+    assert len(cache) == 3
+    assert cache.hits + cache.misses == len(method_bodies)
+    assert cache.misses >= 3
+
+
+def test_cache_operand_overrun():
+    cache = LRUMethodBodyCache()
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body_operand_overrun))
+
+    # method bodies whose bytes are only known after decoding are decoded as usual and not cached
+    for _ in range(2):
+        assert_method_body_equal(cache.read_method_body_from_bytes(method_body_operand_overrun), expected)
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 2)
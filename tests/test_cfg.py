@@ -0,0 +1,59 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import pytest
+from fixtures import method_body_fat, method_body_operands
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.enums import OpCodeValue
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.cfg import EdgeKind, ControlFlowGraph
+from dncil.cil.body.reader import CilMethodBodyReaderBuffer
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_cfg_branches(columnar):
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands), columnar=columnar)
+    cfg = ControlFlowGraph(body)
+
+    assert len(cfg) == 6
+    assert cfg.block_starts.tolist() == [0, 10, 11, 12, 13, 14, 15]
+    assert [cfg.get_successors(block).tolist() for block in range(len(cfg))] == [[1], [3, 1, 2], [3], [0, 4], [5], []]
+    assert cfg.get_successor_kinds(1).tolist() == [EdgeKind.Branch, EdgeKind.Branch, EdgeKind.Next]
+    assert [cfg.get_predecessors(block).tolist() for block in range(len(cfg))] == [[3], [0, 1], [1], [1, 2], [3], [4]]
+    assert cfg.get_predecessor_kinds(3).tolist() == [EdgeKind.Branch, EdgeKind.Next]
+
+    assert cfg.get_block(12) == 3
+    assert cfg.get_instruction_indexes(3) == range(12, 13)
+    assert [insn.opcode.value for insn in cfg.get_instructions(1)] == [OpCodeValue.Switch]
+    assert cfg.get_block_offset(1) == body.instructions[10].offset
+    assert len(list(cfg.iter_edges())) == len(cfg.successors) == 8
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_cfg_exception_handlers(columnar):
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_fat), columnar=columnar)
+    cfg = ControlFlowGraph(body)
+
+    # try, catch handler, finally handler, and the ret both leave instructions branch to
+    assert cfg.block_starts.tolist() == [0, 3, 7, 10, 11]
+    assert list(cfg.iter_edges()) == [
+        (0, 3, EdgeKind.Branch),
+        (0, 1, EdgeKind.Exception),
+        (0, 2, EdgeKind.Exception),
+        (1, 3, EdgeKind.Branch),
+        (1, 2, EdgeKind.Exception),
+    ]
+    assert cfg.get_predecessors(3).tolist() == [0, 1]
+
+
+def test_cfg_bad_branch_target():
+    # br.s into the middle of itself
+    body = CilMethodBody(CilMethodBodyReaderBuffer(b"\x0a\x2b\xff"))
+    with pytest.raises(MethodBodyFormatError):
+        ControlFlowGraph(body)
@@ -0,0 +1,88 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import pytest
+from fixtures import (
+    method_body_fat,
+    method_body_tiny,
+    method_body_operands,
+    method_body_far_switch,
+    assert_method_body_equal,
+    method_body_operand_overrun,
+)
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.enums import OpCodeValue
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.reader import CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer
+from dncil.cil.body.columns import InstructionColumns
+
+
+@pytest.mark.parametrize("method_body", [method_body_tiny, method_body_fat, method_body_operands])
+def test_columnar_instructions(method_body):
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body))
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body), columnar=True)
+
+    assert isinstance(body.instructions, InstructionColumns)
+    assert_method_body_equal(body, expected)
+    assert [str(insn) for insn in body.instructions] == [str(insn) for insn in expected.instructions]
+
+
+def test_columns_arrays():
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands), columnar=True)
+    columns = body.instructions
+    assert isinstance(columns, InstructionColumns)
+
+    assert columns.offsets[:3].tolist() == [0x0, 0x2, 0x4]
+    assert columns.opcodes[2] == OpCodeValue.Ldarg
+    assert columns.operand_values[4] == 0x1337
+    assert columns.get_offset(0) == body.offset + body.header_size
+    assert columns[-1].opcode.value == OpCodeValue.Ret
+    assert [insn.offset for insn in columns[1:3]] == [columns.get_offset(1), columns.get_offset(2)]
+
+    with pytest.raises(IndexError):
+        _ = columns[len(columns)]
+
+
+def test_columns_to_numpy():
+    numpy = pytest.importorskip("numpy")
+
+    columns = InstructionColumns.from_bytes(method_body_tiny[1:])
+    arrays = columns.to_numpy()
+
+    assert arrays["opcodes"].tolist() == [OpCodeValue.Ldarg_0, OpCodeValue.Call, OpCodeValue.Ret]
+    assert arrays["offsets"].dtype == numpy.uint32
+
+
+def test_columns_truncated_code():
+    with pytest.raises(MethodBodyFormatError):
+        _ = InstructionColumns.from_bytes(method_body_tiny[1:-2])
+
+
+def test_columns_far_switch():
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body_far_switch))
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_far_switch), columnar=True)
+
+    assert body.instructions[0].operand == expected.instructions[0].operand == [body.offset + 1 + 0x80000008]
+
+
+@pytest.mark.parametrize("reader_type", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+def test_columns_operand_overrun(reader_type):
+    expected = CilMethodBody(reader_type(method_body_operand_overrun))
+    body = CilMethodBody(reader_type(method_body_operand_overrun), columnar=True)
+
+    # columns decode the operand past the end of the method code as the reader does
+    assert_method_body_equal(body, expected)
+    assert body.instructions[0].operand == 1
+
+    code = method_body_operand_overrun[body.header_size :]
+    assert InstructionColumns.from_bytes(code, code_size=body.code_size)[0].get_bytes() == code
+    with pytest.raises(MethodBodyFormatError):
+        _ = InstructionColumns.from_bytes(code[: body.code_size])
+    with pytest.raises(MethodBodyFormatError):
+        _ = CilMethodBody(reader_type(method_body_operand_overrun[:-1]), columnar=True)
@@ -0,0 +1,85 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import os
+import sys
+import subprocess
+
+import pytest
+import fixtures
+from fixtures import get_import_times
+
+import dncil.decode
+from dncil.cil.body import CilMethodBody
+
+FIRST_DECODE_STATEMENT = 'dncil.decode.read_method_body_from_bytes(bytes.fromhex("1E02280C00000A2A"))'
+
+# run statements in a fresh interpreter and print the time taken, in microseconds, including the imports
+TIME_SCRIPT = """
+import time
+start = time.perf_counter()
+{}
+print(int((time.perf_counter() - start) * 1e6))
+"""
+
+# budget for importing dncil.decode and decoding the first method body, relative to importing dncil.cil.body.reader in
+# the same interpreter so it holds on slow runners. the first decode now takes at most ~1.5x the reader import;
+# importing inspect to build the opcode tables, as was done before they were written out, alone took ~5x as long
+FIRST_DECODE_TIME_RATIO = float(os.environ.get("DNCIL_FIRST_DECODE_TIME_RATIO", "2.5"))
+
+
+def get_fresh_time(tmp_path, statements, runs=5):
+    """get fastest time, in microseconds, to run statements in a fresh interpreter"""
+    # compile modules once up front, as an installed package is, so the measurement does not include compilation
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=str(tmp_path))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    times = []
+    for _ in range(runs + 1):
+        result = subprocess.run(
+            [sys.executable, "-c", TIME_SCRIPT.format(statements)], capture_output=True, text=True, check=True, env=env
+        )
+        times.append(int(result.stdout))
+    return min(times[1:])
+
+
+def test_decode_import_time():
+    times = get_import_times("dncil.decode")
+
+    assert "dncil.decode" in times
+    # heavy modules are imported on first use of a name that needs them
+    for module in ("typing", "dncil.cil.enums", "dncil.cil.opcode", "dncil.cil.body.reader"):
+        assert module not in times
+
+
+def test_first_decode_time(tmp_path):
+    times = get_import_times("dncil.decode", FIRST_DECODE_STATEMENT)
+
+    assert "dncil.cil.opcode" in times
+    # opcode and operand reader tables are built without reflection
+    for module in ("inspect", "dis", "ast"):
+        assert module not in times
+
+    reader_import_time = get_fresh_time(tmp_path, "import dncil.cil.body.reader")
+    first_decode_time = get_fresh_time(tmp_path, f"import dncil.decode\n{FIRST_DECODE_STATEMENT}")
+    print("dncil.cil.body.reader import time: %d us" % reader_import_time)
+    print("dncil.decode import and first decode time: %d us" % first_decode_time)
+    assert first_decode_time < FIRST_DECODE_TIME_RATIO * reader_import_time
+
+
+def test_decode_attributes():
+    body = dncil.decode.read_method_body_from_bytes(fixtures.method_body_tiny)
+    assert isinstance(body, CilMethodBody)
+    assert dncil.decode.CilMethodBody is CilMethodBody
+
+    assert set(dncil.decode.__all__) <= set(dir(dncil.decode))
+    for name in dncil.decode.__all__:
+        assert getattr(dncil.decode, name) is not None
+
+    with pytest.raises(AttributeError):
+        _ = dncil.decode.OpCodes
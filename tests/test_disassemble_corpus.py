@@ -0,0 +1,104 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import json
+import time
+import argparse
+import multiprocessing
+
+import pytest
+from fixtures import load_script, build_dotnet_pe, method_body_tiny
+
+dnfile = pytest.importorskip("dnfile")
+
+
+@pytest.fixture
+def disassemble_corpus():
+    return load_script("disassemble_corpus")
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disassemble_corpus_resume(disassemble_corpus, tmp_path, monkeypatch):
+    root = tmp_path / "corpus"
+    normalize_path = disassemble_corpus.normalize_path
+    (root / "sub").mkdir(parents=True)
+    (root / "a.exe").write_bytes(b"MZ" + b"\x00" * 0x40)
+    (root / "sub" / "b.exe").write_bytes(b"not a PE file")
+    output = root / "results.jsonl"
+
+    args = argparse.Namespace(root=str(root), output=str(output), checkpoint=None, jobs=2, timeout=60.0)
+    disassemble_corpus.main(args)
+
+    records = read_records(output)
+    # the output and checkpoint files below root are not disassembled
+    assert sorted(record["path"] for record in records) == [
+        normalize_path(root / "a.exe"),
+        normalize_path(root / "sub" / "b.exe"),
+    ]
+    assert all(record["status"] == "error" for record in records)
+
+    # completed files are skipped however root is given
+    (root / "sub" / "c.exe").write_bytes(b"not a PE file either")
+    monkeypatch.chdir(tmp_path)
+    args = argparse.Namespace(
+        root="corpus/sub/..", output="corpus/results.jsonl", checkpoint=None, jobs=2, timeout=60.0
+    )
+    disassemble_corpus.main(args)
+
+    records = read_records(output)
+    assert [record["path"] for record in records[2:]] == [normalize_path(root / "sub" / "c.exe")]
+
+
+def test_disassemble_corpus_dotnet(disassemble_corpus, tmp_path):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    (root / "methods.exe").write_bytes(build_dotnet_pe([("Main", method_body_tiny), ("Abstract", None)]))
+    output = tmp_path / "results.jsonl"
+
+    args = argparse.Namespace(root=str(root), output=str(output), checkpoint=None, jobs=1, timeout=60.0)
+    disassemble_corpus.main(args)
+
+    # abstract methods have no method body; offsets are file offsets and tokens are written as their integer value
+    assert read_records(output) == [
+        {
+            "path": disassemble_corpus.normalize_path(root / "methods.exe"),
+            "status": "ok",
+            "methods": [
+                {
+                    "rid": 1,
+                    "name": "Main",
+                    "offset": 0x248,
+                    "code_size": 7,
+                    "instructions": [[0x249, "ldarg.0", None], [0x24A, "call", 0x0A00000C], [0x24F, "ret", None]],
+                }
+            ],
+        }
+    ]
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="patched disassemble_file only reaches forked workers"
+)
+def test_disassemble_corpus_timeout(disassemble_corpus, tmp_path, monkeypatch):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    (root / "slow.exe").write_bytes(b"not a PE file")
+    output = tmp_path / "results.jsonl"
+    monkeypatch.setattr(disassemble_corpus, "disassemble_file", lambda path: time.sleep(60))
+
+    args = argparse.Namespace(root=str(root), output=str(output), checkpoint=None, jobs=1, timeout=0.1)
+    start = time.monotonic()
+    disassemble_corpus.main(args)
+
+    # the worker is terminated rather than waited for
+    assert time.monotonic() - start < 30
+    assert read_records(output) == [{"path": disassemble_corpus.normalize_path(root / "slow.exe"), "status": "timeout"}]
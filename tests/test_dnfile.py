@@ -0,0 +1,128 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import argparse
+
+import pytest
+from fixtures import (
+    build_pe,
+    load_script,
+    build_dotnet_pe,
+    method_body_fat,
+    method_body_tiny,
+    get_data_path_by_name,
+    assert_method_body_equal,
+)
+
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.reader import CilMethodBodyReaderBytes
+
+dnfile = pytest.importorskip("dnfile")
+
+from dncil.cil.body import CilMethodBody  # noqa: E402
+from dncil.integrations.dnfile import (  # noqa: E402
+    has_method_body,
+    read_method_body,
+    iter_method_bodies,
+    iter_method_bodies_parallel,
+)
+
+
+def test_read_method_body():
+    section_data = method_body_tiny + method_body_fat
+    pe = dnfile.dnPE(data=build_pe(section_data))
+
+    body = read_method_body(pe, 0x1000)
+    assert body.offset == 0x200
+    assert body.get_bytes() == method_body_tiny
+
+    body = read_method_body(pe, 0x1000 + len(method_body_tiny))
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body_fat))
+    assert_method_body_equal(body, expected, 0x200 + len(method_body_tiny))
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = read_method_body(pe, 0x4000)
+
+    # not a .NET file
+    assert list(iter_method_bodies(pe)) == []
+
+    with pytest.raises(ValueError):
+        _ = list(iter_method_bodies(pe, lazy=True, skip_errors=True))
+
+
+def test_read_method_body_bounded_by_section():
+    # the file data following the section completes the method body but is not part of the section
+    section_data = b"\x00" * (0x200 - len(method_body_fat) // 2) + method_body_fat[: len(method_body_fat) // 2]
+    pe = dnfile.dnPE(data=build_pe(section_data, method_body_fat[len(method_body_fat) // 2 :]))
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = read_method_body(pe, 0x1000 + 0x200 - len(method_body_fat) // 2)
+
+
+def test_iter_method_bodies():
+    path = get_data_path_by_name("hello-world.exe")
+    if not path.exists():
+        pytest.skip("test data not found")
+
+    pe = dnfile.dnPE(str(path))
+    bodies = dict(iter_method_bodies(pe))
+    pe.close()
+
+    main = next(rid for rid, row in enumerate(pe.net.mdtables.MethodDef, start=1) if row.Name == "Main")
+    assert bodies[main].get_bytes() == bytes.fromhex("36007201000070280400000a002a")
+    assert [insn.mnemonic for insn in bodies[main].instructions] == ["nop", "ldstr", "call", "nop", "ret"]
+
+    rids = range(1, len(pe.net.mdtables.MethodDef) + 1)
+    parallel = dict(iter_method_bodies_parallel(str(path), rids, max_workers=2))
+    assert list(parallel) == list(bodies)
+    assert [body.get_bytes() for body in parallel.values()] == [body.get_bytes() for body in bodies.values()]
+
+
+@pytest.fixture
+def dotnet_path(tmp_path):
+    path = tmp_path / "methods.exe"
+    path.write_bytes(
+        build_dotnet_pe([("Main", method_body_tiny), ("Abstract", None), ("Fat", method_body_fat), ("Broken", b"\x00")])
+    )
+    return path
+
+
+def test_iter_method_bodies_metadata(dotnet_path):
+    pe = dnfile.dnPE(str(dotnet_path))
+
+    # abstract methods have no method body
+    assert [has_method_body(row) for row in pe.net.mdtables.MethodDef] == [True, False, True, True]
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = list(iter_method_bodies(pe))
+
+    bodies = dict(iter_method_bodies(pe, columnar=True, skip_errors=True))
+    assert list(bodies) == [1, 3]
+    assert_method_body_equal(bodies[1], CilMethodBody(CilMethodBodyReaderBytes(method_body_tiny)), 0x248)
+    assert_method_body_equal(bodies[3], CilMethodBody(CilMethodBodyReaderBytes(method_body_fat)), 0x250)
+
+    assert [rid for rid, _ in iter_method_bodies(pe, rids=[3, 2, 1], skip_errors=True)] == [3, 1]
+    pe.close()
+
+    parallel = dict(iter_method_bodies_parallel(str(dotnet_path), range(1, 5), max_workers=2, skip_errors=True))
+    assert list(parallel) == list(bodies)
+    for rid, body in parallel.items():
+        assert_method_body_equal(body, bodies[rid])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_print_cil_from_dn_file(dotnet_path, capsys, jobs):
+    print_cil_from_dn_file = load_script("print_cil_from_dn_file")
+    print_cil_from_dn_file.main(argparse.Namespace(path=str(dotnet_path), jobs=jobs))
+
+    out = capsys.readouterr().out
+    assert "Method: Main" in out and "Method: Fat" in out
+    assert "Method: Abstract" not in out and "Method: Broken" not in out
+    assert "bad header format" in out
+    # user strings are resolved
+    assert '"hi"' in out
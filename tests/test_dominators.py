@@ -0,0 +1,65 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from fixtures import method_body_fat, method_body_operands
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.body.cfg import ControlFlowGraph
+from dncil.cil.body.reader import CilMethodBodyReaderBuffer
+from dncil.cil.body.dominators import DominatorTree, find_natural_loops
+
+
+def test_dominators():
+    cfg = ControlFlowGraph(CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands)))
+
+    dominators = DominatorTree(cfg)
+    assert dominators.idoms.tolist() == [-1, 0, 1, 1, 3, 4]
+    assert dominators.get_children(1) == [2, 3]
+    assert dominators.get_roots() == [0]
+    assert dominators.dominates(1, 5)
+    assert dominators.dominates(3, 3)
+    assert not dominators.dominates(2, 3)
+    assert list(dominators.iter_dominators(5)) == [5, 4, 3, 1, 0]
+
+    post_dominators = DominatorTree(cfg, post=True)
+    assert post_dominators.idoms.tolist() == [1, 3, 3, 4, 5, -1]
+    assert post_dominators.get_roots() == [5]
+    assert post_dominators.dominates(4, 0)
+    assert not post_dominators.dominates(2, 1)
+
+
+def test_dominators_exception_handlers():
+    cfg = ControlFlowGraph(CilMethodBody(CilMethodBodyReaderBuffer(method_body_fat)))
+
+    # handlers are entered from the protected block
+    assert DominatorTree(cfg).idoms.tolist() == [-1, 0, 0, 0]
+    # the try block and catch handler leave to ret or unwind to the finally handler, which both end the method
+    assert DominatorTree(cfg, post=True).idoms.tolist() == [-1, -1, -1, -1]
+    assert find_natural_loops(cfg) == []
+
+
+def test_natural_loops():
+    cfg = ControlFlowGraph(CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands)))
+
+    loops = find_natural_loops(cfg)
+    assert [(loop.header, loop.back_edges, loop.blocks) for loop in loops] == [(0, [3], [0, 1, 2, 3]), (1, [1], [1])]
+    assert 2 in loops[0]
+    assert 4 not in loops[0]
+
+
+def test_infinite_loop():
+    # br.s IL_0000
+    cfg = ControlFlowGraph(CilMethodBody(CilMethodBodyReaderBuffer(b"\x0a\x2b\xfe")))
+
+    assert [loop.blocks for loop in find_natural_loops(cfg)] == [[0]]
+
+    # the loop never reaches the exit
+    post_dominators = DominatorTree(cfg, post=True)
+    assert not post_dominators.is_reachable(0)
+    assert post_dominators.get_roots() == []
+    assert list(post_dominators.iter_dominators(0)) == []
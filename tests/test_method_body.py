@@ -6,71 +6,28 @@
 #  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and limitations under the License.
 
-import binascii
+import mmap
+import pickle
+import struct
 
 import pytest
+from fixtures import method_body_fat, method_body_tiny, method_body_operands, assert_method_body_equal
 
 from dncil.cil.body import CilMethodBody
-from dncil.cil.enums import CorILMethod, OpCodeValue
+from dncil.cil.enums import CorILMethod, OpCodeValue, OperandType
 from dncil.cil.error import MethodBodyFormatError
-from dncil.clr.token import Token
-from dncil.cil.body.reader import CilMethodBodyReaderBytes
-
-"""
-.method private hidebysig static
-    void Main (
-        string[] args
-    ) cil managed
-{
-    // Header Size: 12 bytes
-    // Code Size: 37 (0x25) bytes
-    .maxstack 1
-    .entrypoint
-
-    .try
-    {
-        .try
-        {
-            /* 0x0000025C 7201000070   */ IL_0000: ldstr     "Hello World!"
-            /* 0x00000261 280B00000A   */ IL_0005: call      void [System.Console]System.Console::WriteLine(string)
-            /* 0x00000266 DE18         */ IL_000A: leave.s   IL_0024
-        } // end .try
-        catch [System.Runtime]System.Exception
-        {
-            /* 0x00000268 26           */ IL_000C: pop
-            /* 0x00000269 721B000070   */ IL_000D: ldstr     "Exception occurred."
-            /* 0x0000026E 280B00000A   */ IL_0012: call      void [System.Console]System.Console::WriteLine(string)
-            /* 0x00000273 DE0B         */ IL_0017: leave.s   IL_0024
-        } // end handler
-    } // end .try
-    finally
-    {
-        /* 0x00000275 7243000070   */ IL_0019: ldstr     "Finally occurred."
-        /* 0x0000027A 280B00000A   */ IL_001E: call      void [System.Console]System.Console::WriteLine(string)
-        /* 0x0000027F DC           */ IL_0023: endfinally
-    } // end handler
-
-    /* 0x00000280 2A           */ IL_0024: ret
-} // end of method Program::Main
-"""
-method_body_fat = binascii.unhexlify(
-    "1B30010025000000000000007201000070280B00000ADE1826721B000070280B00000ADE0B7243000070280B00000ADC2A000000011C0000000000000C0C000D0D000001020000001919000B00000000"
+from dncil.clr.local import Local
+from dncil.clr.token import Token, StringToken
+from dncil.clr.argument import Argument
+from dncil.cil.body.reader import (
+    CilMethodBodyReaderBytes,
+    CilMethodBodyReaderBuffer,
+    iter_instructions,
+    iter_method_bodies,
+    read_method_bodies,
+    read_method_body_from_bytes,
 )
-
-"""
-.method public hidebysig specialname rtspecialname
-    instance void .ctor () cil managed
-{
-    // Header Size: 1 byte
-    // Code Size: 7 (0x7) bytes
-    .maxstack 8
-
-    /* 0x000002A1 02           */ IL_0000: ldarg.0
-    /* 0x000002A2 280C00000A   */ IL_0001: call      instance void [System.Runtime]System.Object::.ctor()
-    /* 0x000002A7 2A           */ IL_0006: ret
-} // end of method Program::.ctor
-"""
-method_body_tiny = binascii.unhexlify("1E02280C00000A2A")
+from dncil.cil.instruction import Instruction
 
 
 def test_invalid_header_format():
@@ -195,3 +152,363 @@ def test_read_fat_header_exception_handlers():
     assert body.exception_handlers[0].handler_end == 0x19
     assert isinstance(body.exception_handlers[0].catch_type, Token)
     assert body.exception_handlers[1].is_finally()
+
+
+@pytest.mark.parametrize("method_body", [method_body_tiny, method_body_fat])
+def test_read_method_body_from_buffer(method_body):
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body))
+
+    for buf in (method_body, bytearray(method_body), memoryview(method_body)):
+        body = CilMethodBody(CilMethodBodyReaderBuffer(buf))
+        assert_method_body_equal(body, expected)
+
+
+def test_read_method_body_from_mmap():
+    with mmap.mmap(-1, len(method_body_fat) + 4) as mm:
+        mm[4:] = method_body_fat
+
+        reader = CilMethodBodyReaderBuffer(mm, 4)
+        body = CilMethodBody(reader)
+
+        assert body.offset == 4
+        assert body.get_bytes() == method_body_fat
+        assert body.instructions[0].offset == 4 + body.header_size
+        assert body.instructions[1].get_bytes() == b"\x28\x0b\x00\x00\x0a"
+
+        # method body bytes are copied, so only the reader holds the mmap
+        reader.buf.release()
+        assert body.get_bytes() == method_body_fat
+
+
+def test_read_method_body_zero_copy():
+    buf = bytearray(method_body_fat)
+    body = read_method_body_from_bytes(buf)
+
+    # the buffer is not held once decoded
+    buf += b"\x00"
+    assert body.get_bytes() == method_body_fat
+
+    body = CilMethodBody(CilMethodBodyReaderBuffer(buf, zero_copy=True))
+    with pytest.raises(BufferError):
+        buf += b"\x00"
+
+    del body
+    buf += b"\x00"
+
+
+def test_method_body_bytes_view():
+    buf = bytearray(b"\x00" * 4 + method_body_fat)
+    body = CilMethodBody(CilMethodBodyReaderBuffer(buf, 4, zero_copy=True))
+
+    view = body.get_bytes_view()
+    assert view.obj is buf
+    assert view == method_body_fat
+    assert body._raw_bytes is None
+    assert body.get_header_bytes() == method_body_fat[: body.header_size]
+    assert body.get_instruction_bytes() == method_body_fat[body.header_size : body.header_size + body.code_size]
+    assert body.get_exception_handler_bytes() == method_body_fat[body.header_size + body.code_size :]
+    assert body.get_bytes() == method_body_fat
+    del view
+
+    for reader in (CilMethodBodyReaderBytes(method_body_fat), CilMethodBodyReaderBuffer(method_body_fat)):
+        body = CilMethodBody(reader)
+        assert body._raw_view is None
+        assert body.get_bytes_view() == method_body_fat
+        assert body.get_instruction_bytes() == method_body_fat[body.header_size : body.header_size + body.code_size]
+
+
+def test_truncated_method_body_from_buffer():
+    with pytest.raises(MethodBodyFormatError):
+        _ = read_method_body_from_bytes(method_body_tiny[:-1])
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = read_method_body_from_bytes(b"")
+
+
+@pytest.mark.parametrize("reader_type", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+def test_read_integers(reader_type):
+    reader = reader_type(b"\xfe\xff\xff\xff\x01")
+
+    assert reader.read_int32() == (-2, b"\xfe\xff\xff\xff")
+    assert reader.read_uint8() == (1, b"\x01")
+    with pytest.raises(MethodBodyFormatError):
+        reader.read_uint8()
+
+    reader.seek(0)
+    assert reader._unpack("<H") == (0xFFFE, b"\xfe\xff")
+    assert reader._unpack(">H") == (0xFFFF, b"\xff\xff")
+
+    reader.seek(4)
+    with pytest.raises(MethodBodyFormatError):
+        reader.read_uint16()
+
+
+def test_truncated_two_byte_opcode():
+    with pytest.raises(MethodBodyFormatError):
+        CilMethodBodyReaderBuffer(b"\xfe").read_opcode()
+
+
+def test_operand_reader_override():
+    class TokenValueReader(CilMethodBodyReaderBuffer):
+        def read_inline_method(self, insn):
+            token, token_bytes = super().read_inline_method(insn)
+            return token.value, token_bytes
+
+    body = CilMethodBody(TokenValueReader(method_body_tiny))
+
+    assert body.instructions[1].operand == 0x0A00000C
+    assert TokenValueReader.get_operand_readers()[OperandType.InlineMethod] is TokenValueReader.read_inline_method
+    assert (
+        CilMethodBodyReaderBuffer.get_operand_readers()[OperandType.InlineMethod]
+        is not TokenValueReader.read_inline_method
+    )
+
+
+@pytest.mark.parametrize("reader_type", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+def test_integer_reader_override(reader_type):
+    class MaskedReader(reader_type):
+        def read_uint32(self):
+            value, value_bytes = super().read_uint32()
+            return value ^ 0xFF, value_bytes
+
+    body = CilMethodBody(MaskedReader(method_body_tiny))
+
+    # the table-driven loop reads operands itself, so it must not be used when a subclass changes how they are read
+    assert body.instructions[1].operand == Token(0x0A00000C ^ 0xFF)
+    if reader_type is CilMethodBodyReaderBuffer:
+        assert MaskedReader.get_opcode_decoders() is None
+
+
+def test_read_instructions_table_driven():
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body_operands))
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands))
+
+    assert body.size == len(method_body_operands)
+    assert len(body.instructions) == 15
+    assert_method_body_equal(body, expected)
+
+    assert isinstance(body.instructions[0].operand, Argument)
+    assert isinstance(body.instructions[1].operand, Local)
+    assert isinstance(body.instructions[2].operand, Argument)
+    assert body.instructions[3].operand == -1
+    assert body.instructions[5].operand == -2
+    assert body.instructions[7].operand == 2.5
+    assert isinstance(body.instructions[8].operand, StringToken)
+    assert body.instructions[10].operand == [0x3E + 12, 0x30 + 12]
+    assert body.instructions[12].operand == 0x0 + 12
+    assert body.instructions[13].operand == 0x45 + 12
+
+
+def test_read_instructions_truncated_operand():
+    reader = CilMethodBodyReaderBuffer(method_body_operands[:-8])
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = CilMethodBody(reader)
+
+
+@pytest.mark.parametrize("reader_type", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+def test_instruction_size(reader_type):
+    body = CilMethodBody(reader_type(method_body_operands))
+
+    for insn in body.instructions:
+        assert insn.size == insn.calc_size() == len(insn.get_bytes())
+
+    switch = body.instructions[10]
+    assert switch.opcode.has_variable_operand
+    assert switch.opcode.operand_size == 4
+    assert switch.size == 13
+
+    insn = Instruction()
+    insn.offset = 0
+    insn.opcode = body.instructions[4].opcode
+    insn.operand = 0x1337
+    assert insn.size == 5
+
+
+@pytest.mark.parametrize("reader_type", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+def test_large_switch(reader_type):
+    num_branches = 5000
+    code = b"\x45" + struct.pack("<I%di" % num_branches, num_branches, *range(num_branches)) + b"\x2a"
+    body = CilMethodBody(reader_type(struct.pack("<HHII", 0x3003, 8, len(code), 0) + code))
+
+    switch = body.instructions[0]
+    assert switch.operand == [12 + 5 + num_branches * 4 + i for i in range(num_branches)]
+    assert switch.size == len(code) - 1
+    assert switch.get_operand_size() == len(code) - 2
+    assert switch.get_bytes() == code[:-1]
+    assert body.instructions[1].offset == 12 + len(code) - 1
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = CilMethodBody(reader_type(struct.pack("<HHII", 0x3003, 8, len(code), 0) + code[:-8]))
+
+
+@pytest.mark.parametrize("reader_type", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+def test_instruction_bytes(reader_type):
+    body = CilMethodBody(reader_type(method_body_operands))
+    code = body.get_instruction_bytes()
+
+    for insn in body.instructions:
+        start = insn.offset - body.offset - body.header_size
+        assert insn.get_bytes() == code[start : start + insn.size]
+        assert insn.get_bytes_view() == insn.get_bytes()
+        assert insn.get_opcode_bytes() + insn.get_operand_bytes() == insn.get_bytes()
+        assert insn.get_opcode_size() == insn.opcode.size
+
+    insn = Instruction()
+    insn.opcode_bytes = b"\xfe\x01"
+    insn.operand_bytes = b"\x01\x02"
+    insn.opcode_bytes = b"\x28"
+    assert insn.get_bytes() == b"\x28\x01\x02"
+    assert insn.get_opcode_size() == 1
+    assert insn.get_operand_size() == 2
+
+
+def test_slotted_objects():
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_fat))
+
+    for obj in (body.flags, body.instructions[0], body.instructions[0].operand, body.exception_handlers[0]):
+        assert not hasattr(obj, "__dict__")
+
+
+@pytest.mark.parametrize("method_body", [method_body_tiny, method_body_fat, method_body_operands])
+def test_lazy_method_body(method_body):
+    expected = CilMethodBody(CilMethodBodyReaderBuffer(method_body))
+
+    reader = CilMethodBodyReaderBuffer(method_body)
+    body = CilMethodBody(reader, lazy=True)
+
+    assert body._instructions is None
+    assert body.size == expected.size
+    assert body.code_size == expected.code_size
+    assert body.max_stack == expected.max_stack
+    assert body.get_bytes() == expected.get_bytes()
+    assert len(body.exception_handlers) == len(expected.exception_handlers)
+
+    assert [str(insn) for insn in body.iter_instructions()] == [str(insn) for insn in expected.instructions]
+    assert body._instructions is None
+
+    pos = reader.tell()
+    assert [str(insn) for insn in body.instructions] == [str(insn) for insn in expected.instructions]
+    assert reader.tell() == pos
+    assert body.instructions is body.instructions
+
+
+def test_lazy_iter_instructions_early_exit():
+    reader = CilMethodBodyReaderBuffer(method_body_fat + b"\xff" * 8)
+    body = CilMethodBody(reader, lazy=True)
+
+    for insn in body.iter_instructions():
+        if insn.opcode.value == OpCodeValue.Call:
+            break
+
+    assert insn.offset == 0x11
+    assert reader.tell() == len(method_body_fat)
+
+
+@pytest.mark.parametrize("reader_cls", [CilMethodBodyReaderBytes, CilMethodBodyReaderBuffer])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_lazy_method_body_error_restores_reader(reader_cls, columnar):
+    # tiny header with a 7 byte code size but only a truncated call left
+    reader = reader_cls(bytes.fromhex("1E02280C00"))
+    body = CilMethodBody(reader, lazy=True, columnar=columnar)
+
+    reader.seek(1)
+    with pytest.raises(MethodBodyFormatError):
+        _ = list(body.iter_instructions())
+    assert reader.tell() == 1
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = body.instructions
+    assert reader.tell() == 1
+
+
+def test_iter_instructions():
+    expected = read_method_body_from_bytes(method_body_fat)
+
+    assert [str(insn) for insn in iter_instructions(CilMethodBodyReaderBuffer(method_body_fat))] == [
+        str(insn) for insn in expected.instructions
+    ]
+
+    # stop at the first call to a given method
+    target = Token(0x0A00000B)
+    insn = next(
+        insn
+        for insn in iter_instructions(CilMethodBodyReaderBytes(method_body_fat))
+        if insn.opcode.value == OpCodeValue.Call and insn.operand == target
+    )
+    assert insn.offset == 0x11
+
+
+def test_read_method_bodies():
+    bodies = [method_body_tiny, method_body_fat, method_body_operands]
+    offsets = [0x10, 0x10 + len(method_body_tiny), 0x10 + len(method_body_tiny) + len(method_body_fat)]
+
+    with mmap.mmap(-1, offsets[-1] + len(method_body_operands)) as mm:
+        mm[0x10:] = b"".join(bodies)
+
+        result = read_method_bodies(mm, offsets)
+        assert list(result) == offsets
+        for (offset, body), method_body in zip(result.items(), bodies):
+            expected = CilMethodBody(CilMethodBodyReaderBytes(method_body))
+            assert body.offset == offset
+            assert body.get_bytes() == method_body
+            assert [insn.get_bytes() for insn in body.instructions] == [
+                insn.get_bytes() for insn in expected.instructions
+            ]
+
+        lazy = dict(iter_method_bodies(mm, reversed(offsets), lazy=True))
+        assert [len(lazy[offset].instructions) for offset in offsets] == [
+            len(body.instructions) for body in result.values()
+        ]
+
+        with pytest.raises(MethodBodyFormatError):
+            _ = read_method_bodies(mm, [offsets[0], len(mm)])
+
+        assert list(read_method_bodies(mm, [len(mm), -1, 0, offsets[1]], skip_errors=True)) == [offsets[1]]
+
+        # instructions of lazy method bodies are decoded after skip_errors could skip them
+        with pytest.raises(ValueError):
+            _ = read_method_bodies(mm, offsets, lazy=True, skip_errors=True)
+
+        del lazy, body, expected
+
+    # method bodies that are not lazy copy their bytes, so they outlive the mmap
+    assert [body.get_bytes() for body in result.values()] == bodies
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_pickle_method_body(columnar):
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body_operands))
+
+    for lazy in (False, True):
+        body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands), columnar=columnar, lazy=lazy)
+        body = pickle.loads(pickle.dumps(body))
+        assert body.get_bytes() == method_body_operands
+        assert [insn.get_bytes() for insn in body.instructions] == [insn.get_bytes() for insn in expected.instructions]
+
+    assert str(pickle.loads(pickle.dumps(MethodBodyFormatError("bad method body")))) == "'bad method body'"
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_index_of(columnar):
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands), columnar=columnar, lazy=True)
+    instructions = list(body.instructions)
+
+    for i, insn in enumerate(instructions):
+        assert body.index_of(insn.offset) == i
+        assert body.get_instruction_at(insn.offset).offset == insn.offset
+
+    # branch targets map back to instructions
+    switch = body.get_instruction_at(body.offset + body.header_size + 0x30)
+    assert [body.index_of(target) for target in switch.operand] == [12, 10]
+
+    with pytest.raises(ValueError, match="middle of instruction"):
+        body.index_of(instructions[4].offset + 1)
+    with pytest.raises(ValueError, match="outside method code"):
+        body.index_of(body.offset)
+    with pytest.raises(ValueError, match="outside method code"):
+        body.index_of(body.offset + body.header_size + body.code_size)
+
+    # the index is rebuilt if instructions are replaced
+    body.instructions = instructions[1:]
+    assert body.index_of(instructions[1].offset) == 0
@@ -0,0 +1,41 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from fixtures import get_import_times
+
+from dncil.cil.opcode import ONE_BYTE_OP_CODES, TWO_BYTE_OP_CODES, OpCode, OpCodes
+
+
+def test_opcode_tables():
+    assert len(ONE_BYTE_OP_CODES) == len(TWO_BYTE_OP_CODES) == 0x100
+
+    expected_one_byte = [OpCodes.UNKNOWN1] * 0x100
+    expected_two_byte = [OpCodes.UNKNOWN2] * 0x100
+    for opcode in vars(OpCodes).values():
+        if not isinstance(opcode, OpCode):
+            continue
+        if opcode.value >> 8 == 0:
+            expected_one_byte[opcode.value] = opcode
+        elif opcode.value >> 8 == 0xFE:
+            expected_two_byte[opcode.value & 0xFF] = opcode
+
+    assert ONE_BYTE_OP_CODES == expected_one_byte
+    assert TWO_BYTE_OP_CODES == expected_two_byte
+
+    opcodes = OpCodes()
+    assert opcodes.one_byte_op_codes == ONE_BYTE_OP_CODES
+    assert opcodes.two_byte_op_codes == TWO_BYTE_OP_CODES
+
+
+def test_opcode_import_time():
+    times = get_import_times("dncil.cil.opcode")
+
+    assert "dncil.cil.opcode" in times
+    # opcode tables are written out, so building them does not need reflection
+    assert "inspect" not in times
+    print("dncil.cil.opcode import time: %d us" % times["dncil.cil.opcode"][1])
@@ -0,0 +1,56 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import pytest
+from fixtures import (
+    method_body_fat,
+    method_body_tiny,
+    method_body_operands,
+    assert_method_body_equal,
+    method_body_operand_overrun,
+)
+
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.reader import read_method_bodies
+from dncil.cil.body.columns import InstructionColumns
+from dncil.cil.body.parallel import iter_method_bodies_parallel
+
+METHOD_BODIES = (method_body_tiny, method_body_fat, method_body_operands, method_body_operand_overrun)
+
+
+@pytest.fixture
+def method_bodies_path(tmp_path):
+    path = tmp_path / "method_bodies.bin"
+    path.write_bytes(b"\x00" * 0x10 + b"".join(METHOD_BODIES) * 4)
+    return path
+
+
+def test_iter_method_bodies_parallel(method_bodies_path):
+    data = method_bodies_path.read_bytes()
+    offsets = [0x10]
+    for method_body in METHOD_BODIES * 4:
+        offsets.append(offsets[-1] + len(method_body))
+    offsets.pop()
+
+    expected = read_method_bodies(data, offsets)
+    result = list(iter_method_bodies_parallel(str(method_bodies_path), offsets, max_workers=2, chunk_size=2))
+
+    assert [offset for offset, _ in result] == offsets
+    for offset, body in result:
+        assert isinstance(body.instructions, InstructionColumns)
+        assert_method_body_equal(body, expected[offset])
+
+
+def test_iter_method_bodies_parallel_errors(method_bodies_path):
+    path = str(method_bodies_path)
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = list(iter_method_bodies_parallel(path, [0x10, 0], max_workers=2))
+
+    result = list(iter_method_bodies_parallel(path, [0, 0x10], max_workers=2, skip_errors=True))
+    assert [offset for offset, _ in result] == [0x10]
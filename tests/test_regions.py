@@ -0,0 +1,73 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from fixtures import method_body_fat, method_body_operands
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.enums import ExceptionHandlerType
+from dncil.cil.exception import ExceptionHandler
+from dncil.cil.body.reader import CilMethodBodyReaderBuffer
+from dncil.cil.body.regions import RegionKind, RegionIssueKind, ExceptionRegionTree
+
+
+def build_exception_handler(try_start, try_end, handler_start, handler_end):
+    eh = ExceptionHandler(ExceptionHandlerType.Finally)
+    eh.try_start = try_start
+    eh.try_end = try_end
+    eh.handler_start = handler_start
+    eh.handler_end = handler_end
+    return eh
+
+
+def test_region_tree():
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_fat))
+    catch, finally_ = body.exception_handlers
+    tree = ExceptionRegionTree(body)
+    code_offset = body.offset + body.header_size
+
+    assert tree.is_valid()
+    assert [(region.kind, region.handler_index) for region in tree.get_regions_at(code_offset + 0x5)] == [
+        (RegionKind.Try, 0),
+        (RegionKind.Try, 1),
+    ]
+    assert tree.get_handlers_at(code_offset + 0x5) == [catch, finally_]
+
+    # catch handler, inside the protected block of the finally handler
+    assert tree.get_region_at(code_offset + 0xD).kind == RegionKind.Handler
+    assert tree.get_handlers_at(code_offset + 0xD) == [finally_]
+    assert tree.get_innermost_try_at(code_offset + 0xD).handler is finally_
+
+    # finally handler, and ret outside all regions
+    assert [region.kind for region in tree.get_regions_at(code_offset + 0x1A)] == [RegionKind.Handler]
+    assert tree.get_handlers_at(code_offset + 0x1A) == []
+    assert tree.get_regions_at(code_offset + 0x24) == []
+    assert tree.get_innermost_try_at(code_offset + 0x24) is None
+    assert tree.get_region_at(body.offset) is None
+
+
+def test_region_tree_issues():
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_operands))
+    body.exception_handlers = [
+        build_exception_handler(0x0, 0x10, 0x10, 0x20),
+        # protected block partially overlaps the first
+        build_exception_handler(0x8, 0x18, 0x20, 0x30),
+        build_exception_handler(0x30, 0x30, 0x30, 0x100),
+    ]
+    tree = ExceptionRegionTree(body)
+
+    assert not tree.is_valid()
+    assert sorted((issue.kind, issue.region.handler_index) for issue in tree.issues) == [
+        (RegionIssueKind.Empty, 2),
+        (RegionIssueKind.OutOfRange, 2),
+        (RegionIssueKind.Overlap, 1),
+    ]
+
+    # malformed regions are left out of the tree
+    code_offset = body.offset + body.header_size
+    assert [region.handler_index for region in tree.get_regions_at(code_offset + 0x9)] == [0]
+    assert [region.handler_index for region in tree.get_regions_at(code_offset + 0x22)] == [1]
@@ -0,0 +1,90 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import io
+import pickle
+
+import pytest
+from fixtures import (
+    method_body_fat,
+    method_body_tiny,
+    method_body_operands,
+    method_body_far_switch,
+    assert_method_body_equal,
+    method_body_operand_overrun,
+)
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.error import MethodBodyFormatError
+from dncil.cil.body.reader import CilMethodBodyReaderBytes
+from dncil.cil.body.columns import InstructionColumns
+from dncil.cil.body.serialize import HEADER, dump, load, dumps, loads
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize(
+    "method_body",
+    [method_body_tiny, method_body_fat, method_body_operands, method_body_far_switch, method_body_operand_overrun],
+)
+def test_dumps_loads(method_body, columnar):
+    expected = CilMethodBody(CilMethodBodyReaderBytes(method_body), columnar=columnar)
+
+    data = dumps(expected)
+    assert len(data) < len(pickle.dumps(expected))
+
+    body = loads(data)
+    assert isinstance(body.instructions, InstructionColumns)
+    assert_method_body_equal(body, expected)
+    assert dumps(body) == data
+
+    # relocated method body
+    assert_method_body_equal(loads(data, offset=0x1000), expected, offset=0x1000)
+
+
+def test_dump_load_stream():
+    bodies = [
+        CilMethodBody(CilMethodBodyReaderBytes(b)) for b in (method_body_tiny, method_body_fat, method_body_operands)
+    ]
+
+    f = io.BytesIO()
+    for body in bodies:
+        dump(body, f)
+
+    f.seek(0)
+    for expected in bodies:
+        assert_method_body_equal(load(f), expected)
+    assert f.read() == b""
+
+
+def test_loads_errors():
+    data = dumps(CilMethodBody(CilMethodBodyReaderBytes(method_body_operands)))
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = loads(data[:-1])
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = loads(data[: HEADER.size - 1])
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = loads(b"XXXX" + data[4:])
+
+    with pytest.raises(MethodBodyFormatError):
+        _ = loads(data[:4] + b"\xff" + data[5:])
+
+
+def test_dumps_decodes_method_code():
+    class TokenValueReader(CilMethodBodyReaderBytes):
+        def read_inline_method(self, insn):
+            token, token_bytes = super().read_inline_method(insn)
+            return token.value, token_bytes
+
+    body = CilMethodBody(TokenValueReader(method_body_tiny))
+    assert body.instructions[1].operand == 0x0A00000C
+
+    # operands are encoded as decoded from the method body bytes, not as the reader subclass returned them
+    assert_method_body_equal(loads(dumps(body)), CilMethodBody(CilMethodBodyReaderBytes(method_body_tiny)))
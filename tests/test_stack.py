@@ -0,0 +1,57 @@
+# Copyright (C) 2022 Mandiant, Inc. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: [package root]/LICENSE.txt
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+#  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import binascii
+
+import pytest
+from fixtures import method_body_fat, method_body_tiny
+
+from dncil.cil.body import CilMethodBody
+from dncil.cil.enums import OpCodeValue
+from dncil.cil.body.stack import StackAnalysis, StackIssueKind
+from dncil.cil.body.reader import CilMethodBodyReaderBuffer
+
+
+def resolve(insn):
+    # Console.WriteLine(string) and Object..ctor() each pop one value and return void; ret returns void
+    if insn.opcode.value == OpCodeValue.Call:
+        return 1, 0
+    return 0, 0
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_stack_depths(columnar):
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_fat), columnar=columnar)
+    analysis = StackAnalysis(body, resolve)
+
+    # try block, catch handler entered with the exception object, finally handler, ret
+    assert analysis.depths.tolist() == [0, 1, 0, 1, 0, 1, 0, 0, 1, 0, 0]
+    assert analysis.max_depth == 1
+    assert analysis.issues == []
+    assert analysis.check_max_stack()
+    assert analysis.get_depth(body.instructions[3].offset) == 1
+
+
+def test_stack_issues():
+    body = CilMethodBody(CilMethodBodyReaderBuffer(method_body_tiny))
+    assert StackAnalysis(body, resolve).issues == []
+
+    # pop; ret
+    analysis = StackAnalysis(CilMethodBody(CilMethodBodyReaderBuffer(b"\x0a\x26\x2a")), resolve)
+    assert [issue.kind for issue in analysis.issues] == [StackIssueKind.Underflow]
+
+    # ldarg.0; brtrue.s IL_0004; ldc.i4.0; ret, so ret is reached with stack depths 0 and 1
+    analysis = StackAnalysis(CilMethodBody(CilMethodBodyReaderBuffer(b"\x16\x02\x2d\x01\x16\x2a")), resolve)
+    assert [issue.kind for issue in analysis.issues] == [StackIssueKind.Mismatch]
+    assert "mismatch @ offset 0x5" in str(analysis.issues[0])
+
+    # max stack 0; ldarg.0; pop; ret
+    body = CilMethodBody(CilMethodBodyReaderBuffer(binascii.unhexlify("133000000300000000000000" + "02262A")))
+    analysis = StackAnalysis(body, resolve)
+    assert [issue.kind for issue in analysis.issues] == [StackIssueKind.MaxStack]
+    assert not analysis.check_max_stack()
@@ -6,7 +6,7 @@
 #  is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and limitations under the License.
 
-from dncil.clr.token import Token
+from dncil.clr.token import Token, StringToken, InvalidToken
 
 
 def test_token_fields():
@@ -15,3 +15,9 @@ def test_token_fields():
     assert isinstance(token, Token)
     assert token.table == 0x6
     assert token.rid == 0x1
+
+
+def test_token_slots():
+    for token in (Token(0x06000001), StringToken(0x70000001), InvalidToken(0x0)):
+        assert not hasattr(token, "__dict__")
+        assert token.value == int(token)